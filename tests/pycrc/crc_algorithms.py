@@ -26,7 +26,8 @@ CRC algorithms implemented in Python.
 If you want to study the Python implementation of the CRC routines, then this
 is a good place to start from.
 
-The algorithms Bit by Bit, Bit by Bit Fast and Table-Driven are implemented.
+The algorithms Bit by Bit, Bit by Bit Fast, Table-Driven, Slice-by-N and Long
+Division are implemented.
 
 This module can also be used as a library from within Python.
 
@@ -43,13 +44,532 @@ This is an example use of the different algorithms:
 >>> print("0x%x" % crc.bit_by_bit("123456789"))
 >>> print("0x%x" % crc.bit_by_bit_fast("123456789"))
 >>> print("0x%x" % crc.table_driven("123456789"))
+>>> print("0x%x" % crc.slice_by("123456789", 8))
+>>> print("0x%x" % crc.long_division("123456789"))
+
+All algorithms accept a str or any object which supports the buffer protocol,
+and an optional range of the message; buffers are not copied as a whole:
+
+>>> data = bytearray(b"--123456789--")
+>>> print("0x%x" % crc.slice_by(data, start = 2, end = -2))
+>>> print("0x%x" % crc.slice_by("\u00e4\u00f6\u00fc", encoding = "utf-8"))
+
+Models which use the same Width and Poly as one of the CRC routines of the
+standard library, such as crc-32, jam, xmodem or kermit, can be calculated
+with that routine; other models fall back to the slice_by algorithm:
+
+>>> print("0x%x" % crc.native("123456789"))
+
+The lookup tables of the table-driven algorithm are kept in a process-wide
+cache, shared by all Crc instances with the same table parameters:
+
+>>> from crc_algorithms import table_cache
+>>> print("hits: %d, misses: %d" % (table_cache.Hits, table_cache.Misses))
+
+The tables are stored as compact arrays.  The memory used by the cached tables
+of a model is reported by table_memory():
+
+>>> print(crc.table_memory())
+
+The CRC of a message which is not available in one piece can be calculated
+incrementally, with an interface similar to the one of the hashlib module:
+
+>>> import crc_algorithms
+>>>
+>>> h = crc_algorithms.new("crc-32")
+>>> h.update(b"12345")
+>>> h.update(b"6789")
+>>> print("0x%x" % h.crcValue)
+>>> print(h.hexdigest())
+
+Messages whose length is not a multiple of 8 bits are given as a buffer and
+a length in bits; the bits of the last octet are used starting with the most
+significant bit (the least significant bit for reflected models):
+
+>>> print("0x%x" % crc.bits(b"120", 20))
+
+The CRC of a concatenation can be calculated from the CRCs of its parts:
+
+>>> crc_a = crc.table_driven("12345")
+>>> crc_b = crc.table_driven("6789")
+>>> print("0x%x" % crc.combine(crc_a, crc_b, 4))
+
+The CRCs of several models are calculated in a single pass; models with the
+same Width, Poly and ReflectIn, such as crc-32 and jam, share a register:
+
+>>> h = crc_algorithms.new_multi(["crc-32", "jam", "crc-32c"], b"123456789")
+>>> print(["0x%x" % crc for crc in h.crcValues])
+
+Long runs of zero octets or of a repeated fill pattern are fed into the
+register in O(log(count)) steps:
+
+>>> h = crc_algorithms.new("crc-32")
+>>> h.update_zeros(1 << 30)
+>>> h.update_repeat(b"\\xde\\xad\\xbe\\xef", 1 << 20)
+>>> print(h.hexdigest())
+
+A rolling CRC over the last 48 octets of a stream yields the boundaries of
+content-defined chunks of about 8 KiB on average:
+
+>>> from crc_algorithms import CrcRolling
+>>>
+>>> r = CrcRolling(crc, 48)
+>>> print(list(r.scan(open("image.bin", "rb").read(), 0x1fff)))
+"""
+
+from collections import OrderedDict
+from crc_models import CrcModels
+import array
+import binascii
+import codecs
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+try:
+    # The frozen table module, generated at build time by crc_freeze.py.
+    import crc_frozen
+except ImportError:
+    crc_frozen = None
+try:
+    # zlib releases the GIL while it calculates the CRC of large buffers.
+    from zlib import crc32
+except ImportError:
+    from binascii import crc32
+
+
+# The bit-reversed value of every octet, for use with bytes.translate().
+REFLECTED_OCTETS = bytes(bytearray(int("{0:08b}".format(i)[::-1], 2) for i in range(256)))
+
+# The number of characters of a string encoded at a time.
+STR_CHUNK_SIZE = 64 * 1024
+
+# The number of octets copied at a time by the slice_by algorithm.
+SLICE_BLOCK_SIZE = 64 * 1024
+
+# The minimal number of octets of a chunk processed by the long division
+# algorithm in python_update.  Shorter chunks are processed faster by the
+# table-driven algorithm.
+LONG_DIVISION_MIN_SIZE = 256
+
+# The minimal index width of a table generated with NumPy, if it is installed.
+NUMPY_TABLE_IDX_WIDTH = 12
+
+# The version of the format of the frozen table module crc_frozen.  A module
+# of another version is ignored.
+FROZEN_VERSION = 1
+
+# The version of the format of the table files in the on-disk table cache.
+# Files of other versions are ignored and rewritten.
+TABLE_FILE_VERSION = 1
+
+# The header of a table file: magic, version, typecode, byte order ('l' or
+# 'b'), item size, the number of tables (0 for a single table), the number of
+# entries of each table and the CRC-32 of the entries.  The entries follow in
+# the native byte order of the machine which wrote the file.
+TABLE_FILE_HEADER = struct.Struct("<8sIccBxIQI")
+TABLE_FILE_MAGIC = b"pycrctbl"
+
+# The CRC routines of the standard library, which are implemented in C, as
+# tuples of (Width, Poly, reflected, xor, function).  The function takes the
+# message and the register xor'ed with xor, and returns the updated register
+# xor'ed with xor.
+NATIVE_CRCS = [
+    (32, 0x04c11db7, True,  0xffffffff, crc32),
+    (16, 0x1021,     False, 0x0000,     binascii.crc_hqx),
+]
+
+
+# The template of the specialised update functions of the table-driven
+# algorithm (see Crc.gen_table_driven_source).  The function returned by
+# make_update has the same interface as Crc.table_driven_block, without the tbl
+# parameter; the parameters of the Crc object are folded in as constants and
+# the table is bound as a local variable.
+TABLE_DRIVEN_TEMPLATE = """\
+def make_update(tbl):
+    def update(register, pending, pending_bits, in_data, tbl = tbl):
+%(body)s
+    return update
 """
 
+# The loop over the octets, if TableIdxWidth divides 8.  steps holds one
+# TABLE_DRIVEN_STEP per table index in an octet.
+TABLE_DRIVEN_OCTETS = """\
+        for octet in in_data:
+%(steps)s
+        return register, 0, 0"""
+
+# A single table lookup, which feeds the table index idx into the register.
+TABLE_DRIVEN_STEP_NONREFLECTED = """\
+%(indent)sx = register << %(idx_width)d
+%(indent)sregister = (x & %(mask)#x) ^ tbl[(x >> %(shift)d) ^ %(idx)s]"""
+
+TABLE_DRIVEN_STEP_REFLECTED = """\
+%(indent)sregister = (register >> %(idx_width)d) ^ tbl[(register ^ %(idx)s) & %(idx_mask)#x]"""
+
+
+# function compact_table
+###############################################################################
+def compact_table(values, width):
+    """
+    Return the table values as an array.array of the smallest unsigned type
+    which holds width bits, so that the entries are not stored as individual
+    int objects.  Tables with entries of more than 64 bits are returned as a
+    tuple, as lookups in an octet-backed table would have to decode the
+    entries in Python.
+    """
+    for typecode in "BHILQ":
+        if array.array(typecode).itemsize * 8 >= width:
+            return array.array(typecode, values)
+    return tuple(values)
+
+
+# function table_size
+###############################################################################
+def table_size(tbl):
+    """
+    Return the approximate number of octets used by a table, including the
+    entries of tuples and lists.
+    """
+    size = sys.getsizeof(tbl)
+    if isinstance(tbl, (tuple, list)):
+        size += sum(table_size(v) for v in tbl)
+    return size
+
+
+# function gen_linear_table
+###############################################################################
+def gen_linear_table(basis):
+    """
+    Return the table of 2^len(basis) entries with tbl[1 << k] == basis[k] and
+    tbl[a ^ b] == tbl[a] ^ tbl[b], as are all CRC tables.
+
+    Each entry is calculated with a single XOR, by doubling the table with
+    every basis entry.  Large tables are built with NumPy if it is installed;
+    it is imported only here, as it takes longer to import than most tables
+    take to build.
+    """
+    if len(basis) >= NUMPY_TABLE_IDX_WIDTH and max(basis) < 1 << 64:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            tbl = numpy.zeros(1 << len(basis), dtype = numpy.uint64)
+            for k in range(len(basis)):
+                tbl[1 << k:2 << k] = tbl[:1 << k] ^ numpy.uint64(basis[k])
+            return tbl.tolist()
+    tbl = [0]
+    for b in basis:
+        tbl += [b ^ v for v in tbl]
+    return tbl
+
+
+# function write_table_file
+###############################################################################
+def write_table_file(filename, tbl):
+    """
+    Write a table, which is either an array or a tuple or list of arrays of
+    the same type and length, to filename in the format read by
+    read_table_file.  The file is replaced atomically, so that concurrent
+    readers see either the old or the new file.  Return False if the table is
+    not stored as arrays (see compact_table) or if the file cannot be written.
+    """
+    tables = tbl if isinstance(tbl, (tuple, list)) else (tbl, )
+    if len(tables) == 0 or not all(isinstance(t, array.array) for t in tables):
+        return False
+    typecode = tables[0].typecode
+    length = len(tables[0])
+    if any(t.typecode != typecode or len(t) != length for t in tables):
+        return False
+    data = b"".join(t.tobytes() for t in tables)
+    count = len(tables) if isinstance(tbl, (tuple, list)) else 0
+    header = TABLE_FILE_HEADER.pack(TABLE_FILE_MAGIC, TABLE_FILE_VERSION,
+            typecode.encode("latin-1"), sys.byteorder[0].encode("latin-1"),
+            tables[0].itemsize, count, length, crc32(data) & 0xffffffff)
+    dirname = os.path.dirname(filename) or "."
+    try:
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        fd, tmpname = tempfile.mkstemp(prefix = ".tmp-", dir = dirname)
+        try:
+            with os.fdopen(fd, "wb") as out_file:
+                out_file.write(header)
+                out_file.write(data)
+            os.replace(tmpname, filename)
+        except OSError:
+            os.remove(tmpname)
+            raise
+    except OSError:
+        return False
+    return True
+
+
+# function read_table_file
+###############################################################################
+def read_table_file(filename):
+    """
+    Map a table file written by write_table_file read-only into memory and
+    return the table, as a memoryview of the entries or as a tuple of
+    memoryviews.  Return None if the file does not exist, or if it was
+    written in another format version, on a machine with another byte order
+    or item size, or if the checksum of the entries does not match.
+    """
+    try:
+        with open(filename, "rb") as in_file:
+            data = mmap.mmap(in_file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    view = memoryview(data)
+    try:
+        magic, version, typecode, byteorder, itemsize, count, length, checksum = \
+                TABLE_FILE_HEADER.unpack_from(view)
+        typecode = typecode.decode("latin-1")
+    except (struct.error, UnicodeDecodeError):
+        magic = None
+    size = TABLE_FILE_HEADER.size
+    if magic != TABLE_FILE_MAGIC or version != TABLE_FILE_VERSION \
+            or byteorder.decode("latin-1") != sys.byteorder[0] \
+            or typecode not in "BHILQ" or array.array(typecode).itemsize != itemsize \
+            or len(view) != size + max(count, 1) * length * itemsize \
+            or crc32(view[size:]) & 0xffffffff != checksum:
+        view.release()
+        data.close()
+        return None
+    if count == 0:
+        return view[size:].cast(typecode)
+    step = length * itemsize
+    return tuple(view[size + i * step:size + (i + 1) * step].cast(typecode) for i in range(count))
+
+
+# function frozen_params
+###############################################################################
+def frozen_params(width, poly, reflect_in, xor_in, reflect_out, xor_out):
+    """
+    Return the constants (MSB_Mask, Mask, DirectInit, NonDirectInit,
+    CrcShift) of a model from the frozen table module crc_frozen, or None if
+    the module is not installed or does not contain the model.
+    """
+    if crc_frozen is None or crc_frozen.VERSION != FROZEN_VERSION:
+        return None
+    return crc_frozen.MODELS.get((width, poly, reflect_in, xor_in, reflect_out, xor_out))
+
+
+# function frozen_table
+###############################################################################
+def frozen_table(key):
+    """
+    Return the table stored under the table cache key in the frozen table
+    module crc_frozen, as returned by compact_table, or None if the module is
+    not installed or does not contain the table.
+    """
+    if crc_frozen is None or crc_frozen.VERSION != FROZEN_VERSION:
+        return None
+    try:
+        width, values = crc_frozen.TABLES[key]
+    except KeyError:
+        return None
+    if values and isinstance(values[0], tuple):
+        return tuple(compact_table(v, width) for v in values)
+    return compact_table(values, width)
+
+
+# function octet_chunks
+###############################################################################
+def octet_chunks(in_data, start = 0, end = None, encoding = "latin-1"):
+    """
+    Return an iterator over the octets of in_data[start:end], as memoryview
+    objects of unsigned octets.
+
+    in_data can be any object which supports the buffer protocol (bytes,
+    bytearray, memoryview, mmap, array, ...), in which case start and end are
+    octet offsets and the data is not copied, or a str, in which case start
+    and end are character offsets and the string is encoded incrementally
+    with the given encoding.  The default encoding latin-1 maps each
+    character to the octet of the same value.  Other iterables of octet
+    values are copied into a bytearray.
+    """
+    if isinstance(in_data, str):
+        start, end, step = slice(start, end).indices(len(in_data))
+        encoder = codecs.getincrementalencoder(encoding)()
+        for i in range(start, end, STR_CHUNK_SIZE):
+            yield memoryview(encoder.encode(in_data[i:min(i + STR_CHUNK_SIZE, end)]))
+        tail = encoder.encode("", True)
+        if tail:
+            yield memoryview(tail)
+        return
+    try:
+        view = memoryview(in_data)
+    except TypeError:
+        view = memoryview(bytearray(in_data))
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    yield view[start:end]
+
+
+# function octet_blocks
+###############################################################################
+def octet_blocks(in_data, start = 0, end = None, encoding = "latin-1", reflect = False):
+    """
+    Return an iterator over the octets of in_data[start:end] (see
+    octet_chunks), as bytes objects of at most SLICE_BLOCK_SIZE octets.  If
+    reflect is set, the bit order of each octet is reversed with
+    bytes.translate.
+    """
+    for chunk in octet_chunks(in_data, start, end, encoding):
+        for i in range(0, len(chunk), SLICE_BLOCK_SIZE):
+            block = chunk[i:i + SLICE_BLOCK_SIZE].tobytes()
+            if reflect:
+                block = block.translate(REFLECTED_OCTETS)
+            yield block
+
+
+# Class CrcTableCache
+###############################################################################
+class CrcTableCache(object):
+    """
+    A bounded cache of CRC lookup tables.
+
+    The tables are keyed by the parameters which affect their content, i.e.
+    Width, Poly, ReflectIn and TableIdxWidth; models which differ only in
+    XorIn, ReflectOut or XorOut share the same table.  When the cache is full,
+    the least recently used table is evicted.
+
+    The cache can be shared between threads: tables are generated under a
+    lock, so each table is built only once even if several threads request
+    it at the same time.  Lists are stored as tuples; the cached tables must
+    not be modified.
+
+    If Directory is set, the tables are also kept in files in that directory
+    (see write_table_file), so that later processes map them into memory
+    instead of generating them.  The files are named after the cache key and
+    TABLE_FILE_VERSION.  Files which fail to validate are regenerated.
+    """
+
+    # Class constructor
+    ###############################################################################
+    def __init__(self, maxsize = 64, directory = None):
+        """The CrcTableCache constructor.
+
+        The parameters are as follows:
+            maxsize     the maximum number of tables kept in the cache
+            directory   the directory of the on-disk cache, or None
+        """
+        self.MaxSize    = maxsize
+        self.Directory  = directory
+        self.Hits       = 0
+        self.Misses     = 0
+        self.DiskHits   = 0
+        self.__tables   = OrderedDict()
+        self.__lock     = threading.RLock()
+
+
+    # function get
+    ###############################################################################
+    def get(self, key, gen_table):
+        """
+        Return the table stored under key.  On a cache miss, the table is
+        generated by calling gen_table() and stored in the cache.
+        """
+        with self.__lock:
+            try:
+                tbl = self.__tables.pop(key)
+                self.Hits += 1
+            except KeyError:
+                tbl = frozen_table(key)
+                if tbl is None and self.Directory != None:
+                    tbl = read_table_file(self.table_file(key))
+                    if tbl is not None:
+                        self.DiskHits += 1
+                if tbl is None:
+                    tbl = gen_table()
+                    if isinstance(tbl, list):
+                        tbl = tuple(tbl)
+                    if self.Directory != None:
+                        write_table_file(self.table_file(key), tbl)
+                self.Misses += 1
+                while len(self.__tables) >= self.MaxSize > 0:
+                    self.__tables.popitem(last = False)
+            if self.MaxSize > 0:
+                self.__tables[key] = tbl
+            return tbl
+
+
+    # function table_file
+    ###############################################################################
+    def table_file(self, key):
+        """
+        Return the name of the file of the on-disk cache for key.
+        """
+        name = "v%d-%s.tbl" % (TABLE_FILE_VERSION, "-".join(str(k) for k in key))
+        return os.path.join(self.Directory, name)
+
+
+    # function put
+    ###############################################################################
+    def put(self, key, tbl):
+        """
+        Store a table which has been generated elsewhere, e.g. a table in
+        shared memory (see crc_parallel.SharedTables), under key.
+        """
+        with self.__lock:
+            self.__tables.pop(key, None)
+            while len(self.__tables) >= self.MaxSize > 0:
+                self.__tables.popitem(last = False)
+            if self.MaxSize > 0:
+                self.__tables[key] = tbl
+
+
+    # function memory
+    ###############################################################################
+    def memory(self):
+        """
+        Return a dictionary with the approximate number of octets used by each
+        table in the cache, keyed by the cache key.
+        """
+        with self.__lock:
+            return dict((key, table_size(tbl)) for (key, tbl) in self.__tables.items())
+
+
+    # function clear
+    ###############################################################################
+    def clear(self):
+        """
+        Remove all tables from the cache and reset the hit/miss counters.
+        The on-disk cache is not modified.
+        """
+        with self.__lock:
+            self.__tables.clear()
+            self.Hits = 0
+            self.Misses = 0
+            self.DiskHits = 0
+
+
+    # function __len__
+    ###############################################################################
+    def __len__(self):
+        """
+        Return the number of tables in the cache.
+        """
+        return len(self.__tables)
+
+
+# The process-wide table cache used by all Crc instances.  The directory of the
+# on-disk cache can be set with the environment variable PYCRC_CACHE_DIR.
+table_cache = CrcTableCache(directory = os.environ.get("PYCRC_CACHE_DIR") or None)
+
+
 # Class Crc
 ###############################################################################
 class Crc(object):
     """
     A base class for CRC routines.
+
+    A Crc object is immutable and its lookup tables are taken from the
+    process-wide table cache, so it can be used from several threads at the
+    same time.
     """
 
     # Class constructor
@@ -64,29 +584,81 @@ class Crc(object):
             xor_in
             reflect_out
             xor_out
+
+        Poly, XorIn and XorOut are truncated to Width bits, so that e.g. a
+        polynomial written with its implicit top bit gives the same tables
+        as the one without it.  Parameters which are not known, e.g. when
+        code is generated for parameters given at run time, are None.
         """
+        mask = (1 << width) - 1 if width != None else None
+        truncate = lambda value: value & mask if value != None and mask != None else value
         self.Width          = width
-        self.Poly           = poly
+        self.Poly           = truncate(poly)
         self.ReflectIn      = reflect_in
-        self.XorIn          = xor_in
+        self.XorIn          = truncate(xor_in)
         self.ReflectOut     = reflect_out
-        self.XorOut         = xor_out
+        self.XorOut         = truncate(xor_out)
         self.TableIdxWidth  = table_idx_width
 
-        self.MSB_Mask = 0x1 << (self.Width - 1)
-        self.Mask = ((self.MSB_Mask - 1) << 1) | 1
         if self.TableIdxWidth != None:
             self.TableWidth = 1 << self.TableIdxWidth
         else:
             self.TableIdxWidth = 8
             self.TableWidth = 1 << self.TableIdxWidth
 
-        self.DirectInit = self.XorIn
-        self.NonDirectInit = self.__get_nondirect_init(self.XorIn)
-        if self.Width < 8:
-            self.CrcShift = 8 - self.Width
+        # The constants of the models in crc_models.CrcModels are taken from
+        # the frozen table module, if it is installed.
+        params = frozen_params(width, self.Poly, reflect_in, self.XorIn, reflect_out, self.XorOut)
+        if params != None:
+            self.MSB_Mask, self.Mask, self.DirectInit, self.NonDirectInit, self.CrcShift = params
         else:
-            self.CrcShift = 0
+            self.MSB_Mask = 0x1 << (self.Width - 1)
+            self.Mask = ((self.MSB_Mask - 1) << 1) | 1
+            self.DirectInit = self.XorIn
+            self.NonDirectInit = self.__get_nondirect_init(self.XorIn)
+            if self.Width < 8:
+                self.CrcShift = 8 - self.Width
+            else:
+                self.CrcShift = 0
+        self.Native = None
+        for native in NATIVE_CRCS:
+            if native[0] == self.Width and native[1] == self.Poly & self.Mask:
+                self.Native = native
+        self.__compiled = {}
+        self.__frozen = True
+
+
+    # function __setattr__
+    ###############################################################################
+    def __setattr__(self, name, value):
+        """
+        The parameters of a Crc object are read-only once it is constructed,
+        so one object can safely be shared between threads.
+        """
+        if getattr(self, "_Crc__frozen", False):
+            raise AttributeError("can't set attribute %s: Crc objects are immutable" % name)
+        object.__setattr__(self, name, value)
+
+
+    # function __getstate__
+    ###############################################################################
+    def __getstate__(self):
+        """
+        Return the state for pickle.  The compiled update functions cannot be
+        pickled; they are rebuilt on demand.
+        """
+        state = self.__dict__.copy()
+        state["_Crc__compiled"] = {}
+        return state
+
+
+    # function __setstate__
+    ###############################################################################
+    def __setstate__(self, state):
+        """
+        Restore the state from pickle, bypassing the read-only attributes.
+        """
+        self.__dict__.update(state)
 
 
     # function __get_nondirect_init
@@ -110,36 +682,35 @@ class Crc(object):
     ###############################################################################
     def reflect(self, data, width):
         """
-        reflect a data word, i.e. reverts the bit order.
+        reflect a data word, i.e. reverts the bit order.  The word is reverted
+        octet by octet with the REFLECTED_OCTETS table.
         """
-        x = data & 0x01
-        for i in range(width - 1):
-            data >>= 1
-            x = (x << 1) | (data & 0x01)
-        return x
+        if width == 8:
+            return REFLECTED_OCTETS[data & 0xff]
+        size = (width + 7) // 8
+        data = (data & ((1 << width) - 1)).to_bytes(size, "little").translate(REFLECTED_OCTETS)
+        return int.from_bytes(data, "big") >> (8 * size - width)
 
 
     # function bit_by_bit
     ###############################################################################
-    def bit_by_bit(self, in_data):
+    def bit_by_bit(self, in_data, start = 0, end = None, encoding = "latin-1"):
         """
         Classic simple and slow CRC implementation.  This function iterates bit
         by bit over the augmented input message and returns the calculated CRC
         value at the end.
-        """
-        # If the input data is a string, convert to bytes.
-        if isinstance(in_data, str):
-            in_data = [ord(c) for c in in_data]
 
+        The message is in_data[start:end]; see octet_chunks for the accepted
+        types of in_data and the meaning of encoding.
+        """
         register = self.NonDirectInit
-        for octet in in_data:
-            if self.ReflectIn:
-                octet = self.reflect(octet, 8)
-            for i in range(8):
-                topbit = register & self.MSB_Mask
-                register = ((register << 1) & self.Mask) | ((octet >> (7 - i)) & 0x01)
-                if topbit:
-                    register ^= self.Poly
+        for block in octet_blocks(in_data, start, end, encoding, self.ReflectIn):
+            for octet in block:
+                for i in range(8):
+                    topbit = register & self.MSB_Mask
+                    register = ((register << 1) & self.Mask) | ((octet >> (7 - i)) & 0x01)
+                    if topbit:
+                        register ^= self.Poly
 
         for i in range(self.Width):
             topbit = register & self.MSB_Mask
@@ -154,28 +725,24 @@ class Crc(object):
 
     # function bit_by_bit_fast
     ###############################################################################
-    def bit_by_bit_fast(self, in_data):
+    def bit_by_bit_fast(self, in_data, start = 0, end = None, encoding = "latin-1"):
         """
         This is a slightly modified version of the bit-by-bit algorithm: it
         does not need to loop over the augmented bits, i.e. the Width 0-bits
         wich are appended to the input message in the bit-by-bit algorithm.
+        The parameters are the same as for bit_by_bit.
         """
-        # If the input data is a string, convert to bytes.
-        if isinstance(in_data, str):
-            in_data = [ord(c) for c in in_data]
-
         register = self.DirectInit
-        for octet in in_data:
-            if self.ReflectIn:
-                octet = self.reflect(octet, 8)
-            for i in range(8):
-                topbit = register & self.MSB_Mask
-                if octet & (0x80 >> i):
-                    topbit ^= self.MSB_Mask
-                register <<= 1
-                if topbit:
-                    register ^= self.Poly
-            register &= self.Mask
+        for block in octet_blocks(in_data, start, end, encoding, self.ReflectIn):
+            for octet in block:
+                for i in range(8):
+                    topbit = register & self.MSB_Mask
+                    if octet & (0x80 >> i):
+                        topbit ^= self.MSB_Mask
+                    register <<= 1
+                    if topbit:
+                        register ^= self.Poly
+                register &= self.Mask
         if self.ReflectOut:
             register = self.reflect(register, self.Width)
         return register ^ self.XorOut
@@ -186,54 +753,1162 @@ class Crc(object):
     def gen_table(self):
         """
         This function generates the CRC table used for the table_driven CRC
-        algorithm.  The Python version cannot handle tables of an index width
-        other than 8.  See the generated C code for tables with different sizes
-        instead.
-        """
-        table_length = 1 << self.TableIdxWidth
-        tbl = [0] * table_length
-        for i in range(table_length):
-            register = i
+        algorithm.  The table has 2^TableIdxWidth entries; entry i is the
+        register after the TableIdxWidth bits of i have been fed into a zero
+        register.  The entries are shifted left by CrcShift.
+        """
+        return compact_table(gen_linear_table(self.gen_table_basis()), self.Width + self.CrcShift)
+
+
+    # function gen_table_basis
+    ###############################################################################
+    def gen_table_basis(self):
+        """
+        Return the entries of the CRC table (see gen_table) at the indices
+        1, 2, 4, ..., 2^(TableIdxWidth - 1).  The other entries are XOR
+        combinations of these.
+        """
+        tbl = []
+        for k in range(self.TableIdxWidth):
+            index = 1 << k
             if self.ReflectIn:
-                register = self.reflect(register, self.TableIdxWidth)
-            register = register << (self.Width - self.TableIdxWidth + self.CrcShift)
+                index = self.reflect(index, self.TableIdxWidth)
+            register = 0
             for j in range(self.TableIdxWidth):
-                if register & (self.MSB_Mask << self.CrcShift) != 0:
-                    register = (register << 1) ^ (self.Poly << self.CrcShift)
-                else:
-                    register = (register << 1)
+                topbit = register & self.MSB_Mask
+                if index & (1 << (self.TableIdxWidth - 1 - j)):
+                    topbit ^= self.MSB_Mask
+                register = (register << 1) & self.Mask
+                if topbit:
+                    register ^= self.Poly
             if self.ReflectIn:
-                register = self.reflect(register >> self.CrcShift, self.Width) << self.CrcShift
-            tbl[i] = register & (self.Mask << self.CrcShift)
+                register = self.reflect(register, self.Width)
+            tbl.append(register << self.CrcShift)
         return tbl
 
 
+    # function table_memory
+    ###############################################################################
+    def table_memory(self):
+        """
+        Return a dictionary with the approximate number of octets used by the
+        tables of this CRC which are currently in the table cache, keyed by a
+        description such as "table-driven" or "slice-by-8".  Tables are shared
+        by all models with the same Width and Poly (and ReflectIn and
+        TableIdxWidth for the table-driven algorithm), so they are reported
+        for each of these models.
+        """
+        report = {}
+        for key, size in table_cache.memory().items():
+            if key[:2] != (self.Width, self.Poly & self.Mask):
+                continue
+            if key[2:] == (self.ReflectIn, self.TableIdxWidth):
+                report["table-driven"] = size
+            elif not isinstance(key[2], bool):
+                report["-".join(str(k) for k in key[2:])] = size
+        return report
+
+
+    # function get_table
+    ###############################################################################
+    def get_table(self):
+        """
+        Return the CRC table used for the table_driven CRC algorithm.  The
+        table is taken from the process-wide table cache if another Crc
+        instance with the same table parameters has generated it before.
+        """
+        key = (self.Width, self.Poly & self.Mask, self.ReflectIn, self.TableIdxWidth)
+        return table_cache.get(key, self.gen_table)
+
+
     # function table_driven
     ###############################################################################
-    def table_driven(self, in_data):
+    def table_driven(self, in_data, start = 0, end = None, encoding = "latin-1"):
         """
         The Standard table_driven CRC algorithm.
+        The parameters are the same as for bit_by_bit.
+        """
+        register = self.table_driven_update(self.init_register(), in_data, start, end, encoding)
+        return self.finalize_register(register)
+
+
+    # function table_driven_update
+    ###############################################################################
+    def table_driven_update(self, register, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the register (see init_register) with the table-driven
+        algorithm.  The message is processed TableIdxWidth bits at a time, for
+        any index width from 1 to 16; with an index width of 16, two octets are
+        consumed per table lookup.  The bits which do not fill a whole table
+        index at the end of the message are processed with a narrower index.
+        The other parameters are the same as for bit_by_bit.
+        """
+        tbl, update = self.get_table_driven_update()
+        return self.__table_driven_run(tbl, update, register, in_data, start, end, encoding)
+
+
+    # function table_driven_generic_update
+    ###############################################################################
+    def table_driven_generic_update(self, register, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        The same as table_driven_update, but with the generic loop of
+        table_driven_block instead of the specialised update function.  This
+        is the reference for the specialised functions.
+        """
+        tbl = self.__table_driven_table()
+        update = lambda register, pending, pending_bits, in_data: \
+                self.table_driven_block(tbl, register, pending, pending_bits, in_data)
+        return self.__table_driven_run(tbl, update, register, in_data, start, end, encoding)
+
+
+    # function __table_driven_run
+    ###############################################################################
+    def __table_driven_run(self, tbl, update, register, in_data, start, end, encoding):
+        """
+        Feed the message to update, one block at a time.
+        """
+        if not self.ReflectIn:
+            register <<= self.CrcShift
+        pending = 0
+        pending_bits = 0
+        for chunk in octet_chunks(in_data, start, end, encoding):
+            for i in range(0, len(chunk), SLICE_BLOCK_SIZE):
+                block = chunk[i:i + SLICE_BLOCK_SIZE].tobytes()
+                register, pending, pending_bits = update(register, pending, pending_bits, block)
+        if pending_bits:
+            register = self.__table_driven_bits(tbl, register, pending, pending_bits)
+        if not self.ReflectIn:
+            register >>= self.CrcShift
+        return register
+
+
+    # function gen_table_driven_source
+    ###############################################################################
+    def gen_table_driven_source(self):
+        """
+        Return the Python source of the update function of the table-driven
+        algorithm, specialised for the parameters of this object (see
+        TABLE_DRIVEN_TEMPLATE).  TableIdxWidth must divide 8.
+        """
+        idx_width = self.TableIdxWidth
+        params = {
+            "idx_width":    idx_width,
+            "idx_mask":     (1 << idx_width) - 1,
+            "mask":         self.Mask << self.CrcShift,
+            "shift":        self.Width + self.CrcShift,
+        }
+        if self.ReflectIn:
+            step = TABLE_DRIVEN_STEP_REFLECTED
+        else:
+            step = TABLE_DRIVEN_STEP_NONREFLECTED
+
+        steps = []
+        for k in range(8 // idx_width):
+            if self.ReflectIn:
+                idx = "(octet >> %d)" % (k * idx_width) if k else "octet"
+            elif idx_width == 8:
+                idx = "octet"
+            elif k == 8 // idx_width - 1:
+                idx = "(octet & %#x)" % params["idx_mask"]
+            else:
+                idx = "((octet >> %d) & %#x)" % (8 - (k + 1) * idx_width, params["idx_mask"])
+            steps.append(step % dict(params, indent = " " * 12, idx = idx))
+        body = TABLE_DRIVEN_OCTETS % dict(params, steps = "\n".join(steps))
+        return TABLE_DRIVEN_TEMPLATE % {"body": body}
+
+
+    # function get_table_driven_update
+    ###############################################################################
+    def get_table_driven_update(self):
+        """
+        Return the table of the table-driven algorithm, in the form used by the
+        update functions, and the update function.  Both are built once and
+        cached in this object.
+
+        If TableIdxWidth divides 8, the update function is specialised for
+        the parameters of this object (see gen_table_driven_source), which
+        unrolls the table lookups of each octet.  For other index widths the
+        specialised loop is not faster, so the generic loop of
+        table_driven_block is used.
+        """
+        compiled = self.__compiled.get("table-driven")
+        if compiled == None:
+            tbl = self.__table_driven_table()
+            if 8 % self.TableIdxWidth == 0:
+                namespace = {}
+                exec(compile(self.gen_table_driven_source(), "<table-driven update>", "exec"), namespace)
+                update = namespace["make_update"](tbl)
+            else:
+                update = lambda register, pending, pending_bits, in_data: \
+                        self.table_driven_block(tbl, register, pending, pending_bits, in_data)
+            compiled = (tbl, update)
+            self.__compiled["table-driven"] = compiled
+        return compiled
+
+
+    # function __table_driven_table
+    ###############################################################################
+    def __table_driven_table(self):
+        """
+        Return the table of the table-driven algorithm in the form used by the
+        update functions: the entries of the reflected algorithms are not
+        shifted by CrcShift.
+        """
+        tbl = self.get_table()
+        if self.ReflectIn and self.CrcShift:
+            tbl = compact_table([v >> self.CrcShift for v in tbl], self.Width)
+        return tbl
+
+
+    # function __table_driven_bits
+    ###############################################################################
+    def __table_driven_bits(self, tbl, register, bits, count):
+        """
+        Update the register with the count <= TableIdxWidth message bits in
+        bits, in the order in which they are fed into the register.
+        """
+        if not self.ReflectIn:
+            x = register << count
+            return (x & (self.Mask << self.CrcShift)) ^ tbl[(x >> (self.Width + self.CrcShift)) ^ bits]
+        else:
+            tblidx = ((register ^ bits) & ((1 << count) - 1)) << (self.TableIdxWidth - count)
+            return (register >> count) ^ tbl[tblidx]
+
+
+    # function __words
+    ###############################################################################
+    def __words(self, in_data, byteorder):
+        """
+        Return the octets of in_data as an array of 16 bit words with the given
+        byte order.
+        """
+        words = array.array('H', in_data)
+        if sys.byteorder != byteorder:
+            words.byteswap()
+        return words
+
+
+    # function table_driven_block
+    ###############################################################################
+    def table_driven_block(self, tbl, register, pending, pending_bits, in_data):
+        """
+        Update the register with the octets of in_data, preceded by the
+        pending_bits < TableIdxWidth bits in pending.  Return the register and
+        the message bits which do not fill a whole table index.
+
+        This is the generic loop, which looks up the parameters of the CRC at
+        run time; see gen_table_driven_source for the specialised version.
+        """
+        idx_width = self.TableIdxWidth
+        shift = self.Width + self.CrcShift
+        mask = self.Mask << self.CrcShift
+        if idx_width == 16 and pending_bits == 8:
+            in_data = bytes(bytearray([pending])) + in_data
+            pending_bits = 0
+        if idx_width == 8 or idx_width == 16:
+            octets = idx_width // 8
+            stop = len(in_data) - len(in_data) % octets
+            if not self.ReflectIn:
+                if octets == 1:
+                    for octet in in_data:
+                        x = register << 8
+                        register = (x & mask) ^ tbl[(x >> shift) ^ octet]
+                else:
+                    for word in self.__words(in_data[:stop], "big"):
+                        x = register << 16
+                        register = (x & mask) ^ tbl[(x >> shift) ^ word]
+            else:
+                if octets == 1:
+                    for octet in in_data:
+                        register = (register >> 8) ^ tbl[(register ^ octet) & 0xff]
+                else:
+                    for word in self.__words(in_data[:stop], "little"):
+                        register = (register >> 16) ^ tbl[(register ^ word) & 0xffff]
+            if stop == len(in_data):
+                return register, 0, 0
+            return register, in_data[-1], 8
+
+        idx_mask = (1 << idx_width) - 1
+        for octet in in_data:
+            if not self.ReflectIn:
+                pending = (pending << 8) | octet
+                pending_bits += 8
+                while pending_bits >= idx_width:
+                    pending_bits -= idx_width
+                    x = register << idx_width
+                    register = (x & mask) ^ tbl[(x >> shift) ^ (pending >> pending_bits)]
+                    pending &= (1 << pending_bits) - 1
+            else:
+                pending |= octet << pending_bits
+                pending_bits += 8
+                while pending_bits >= idx_width:
+                    pending_bits -= idx_width
+                    register = (register >> idx_width) ^ tbl[(register ^ pending) & idx_mask]
+                    pending >>= idx_width
+        return register, pending, pending_bits
+
+
+    # function init_register
+    ###############################################################################
+    def init_register(self):
+        """
+        Return the initial register value for the *_update functions.
+
+        The register holds the direct (non-augmented) CRC register; it is bit
+        reversed if ReflectIn is set, as in the table-driven algorithm.
+        """
+        if self.ReflectIn:
+            return self.reflect(self.DirectInit, self.Width)
+        return self.DirectInit
+
+
+    # function finalize_register
+    ###############################################################################
+    def finalize_register(self, register):
+        """
+        Return the final CRC value of a register returned by one of the *_update
+        functions.
+        """
+        if self.ReflectIn != self.ReflectOut:
+            register = self.reflect(register, self.Width)
+        return register ^ self.XorOut
+
+
+    # function gen_slice_tables
+    ###############################################################################
+    def gen_slice_tables(self, slices):
+        """
+        This function generates the tables used for the slice_by algorithm.
+
+        The slice-by-N algorithm always operates on a reflected register, so
+        the tables are calculated for the reflected polynomial.  Table k holds
+        the contribution of an octet followed by k zero octets.
+        """
+        poly = self.reflect(self.Poly, self.Width)
+        basis = []
+        for i in range(8):
+            register = 1 << i
+            for j in range(8):
+                if register & 0x01:
+                    register = (register >> 1) ^ poly
+                else:
+                    register = (register >> 1)
+            basis.append(register)
+        tbl = gen_linear_table(basis)
+        tables = [tbl]
+        for k in range(1, slices):
+            basis = [(v >> 8) ^ tbl[v & 0xff] for v in basis]
+            tables.append(gen_linear_table(basis))
+        return [compact_table(t, self.Width) for t in tables]
+
+
+    # function get_slice_tables
+    ###############################################################################
+    def get_slice_tables(self, slices):
+        """
+        Return the tables used for the slice_by algorithm from the process-wide
+        table cache.  The tables do not depend on ReflectIn, as the input of the
+        non-reflected algorithms is reflected before it is processed.
         """
-        # If the input data is a string, convert to bytes.
-        if isinstance(in_data, str):
-            in_data = [ord(c) for c in in_data]
+        key = (self.Width, self.Poly & self.Mask, "slice-by", slices)
+        return table_cache.get(key, lambda: self.gen_slice_tables(slices))
 
-        tbl = self.gen_table()
 
-        register = self.DirectInit << self.CrcShift
+    # function gen_rolling_table
+    ###############################################################################
+    def gen_rolling_table(self, window):
+        """
+        This function generates the table of the outgoing octets of a rolling
+        CRC (see CrcRolling) with a window of window octets.  Like the
+        slice-by-N tables, the table is calculated for a reflected register;
+        it holds the contribution of an octet followed by window zero octets.
+        """
+        t0 = self.get_slice_tables(8)[0]
+        op = self.shift_operator(window)
+        basis = [self.reflect(self.mul_mod(self.reflect(t0[1 << i], self.Width), op), self.Width) for i in range(8)]
+        return compact_table(gen_linear_table(basis), self.Width)
+
+
+    # function get_rolling_table
+    ###############################################################################
+    def get_rolling_table(self, window):
+        """
+        Return the table of the outgoing octets of a rolling CRC from the
+        process-wide table cache.
+        """
+        key = (self.Width, self.Poly & self.Mask, "rolling", window)
+        return table_cache.get(key, lambda: self.gen_rolling_table(window))
+
+
+    # function slice_by_update
+    ###############################################################################
+    def slice_by_update(self, register, in_data, slices = 8, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the register (see init_register) with the slice-by-N algorithm.
+        This algorithm reads N = 4, 8 or 16 octets at a time and looks up
+        the contribution of each octet in one of N tables.
+
+        The message is in_data[start:end]; see octet_chunks for the accepted
+        types of in_data and the meaning of encoding.  The input is copied
+        SLICE_BLOCK_SIZE octets at a time.
+        """
+        if slices not in (4, 8, 16):
+            raise ValueError("unsupported number of slices: %r" % slices)
+
+        if not self.ReflectIn:
+            register = self.reflect(register, self.Width)
+        # Reflect the octets of the non-reflected algorithms, so they become
+        # reflected ones with a reflected register and polynomial.
+        for block in octet_blocks(in_data, start, end, encoding, not self.ReflectIn):
+            register = self.__slice_by_block(register, block, slices)
         if not self.ReflectIn:
-            for octet in in_data:
-                tblidx = ((register >> (self.Width - self.TableIdxWidth + self.CrcShift)) ^ octet) & 0xff
-                register = ((register << (self.TableIdxWidth - self.CrcShift)) ^ tbl[tblidx]) & (self.Mask << self.CrcShift)
-            register = register >> self.CrcShift
+            register = self.reflect(register, self.Width)
+        return register
+
+
+    # function __slice_by_block
+    ###############################################################################
+    def __slice_by_block(self, register, in_data, slices):
+        """
+        Update the reflected register with the reflected octets of in_data.
+        """
+        tables = self.get_slice_tables(slices)
+        t0 = tables[0]
+        from_bytes = int.from_bytes
+        stop = len(in_data) - len(in_data) % slices
+        if slices == 4:
+            t1, t2, t3 = tables[1:]
+            for i in range(0, stop, 4):
+                x = register ^ from_bytes(in_data[i:i + 4], "little")
+                register = (x >> 32) ^ \
+                        t3[x & 0xff] ^ t2[(x >> 8) & 0xff] ^ t1[(x >> 16) & 0xff] ^ t0[(x >> 24) & 0xff]
+        elif slices == 8:
+            t1, t2, t3, t4, t5, t6, t7 = tables[1:]
+            for i in range(0, stop, 8):
+                x = register ^ from_bytes(in_data[i:i + 8], "little")
+                register = (x >> 64) ^ \
+                        t7[x & 0xff] ^ t6[(x >> 8) & 0xff] ^ t5[(x >> 16) & 0xff] ^ t4[(x >> 24) & 0xff] ^ \
+                        t3[(x >> 32) & 0xff] ^ t2[(x >> 40) & 0xff] ^ t1[(x >> 48) & 0xff] ^ t0[(x >> 56) & 0xff]
+        else:
+            t1, t2, t3, t4, t5, t6, t7, t8, t9, t10, t11, t12, t13, t14, t15 = tables[1:]
+            for i in range(0, stop, 16):
+                x = register ^ from_bytes(in_data[i:i + 16], "little")
+                register = (x >> 128) ^ \
+                        t15[x & 0xff] ^ t14[(x >> 8) & 0xff] ^ t13[(x >> 16) & 0xff] ^ t12[(x >> 24) & 0xff] ^ \
+                        t11[(x >> 32) & 0xff] ^ t10[(x >> 40) & 0xff] ^ t9[(x >> 48) & 0xff] ^ t8[(x >> 56) & 0xff] ^ \
+                        t7[(x >> 64) & 0xff] ^ t6[(x >> 72) & 0xff] ^ t5[(x >> 80) & 0xff] ^ t4[(x >> 88) & 0xff] ^ \
+                        t3[(x >> 96) & 0xff] ^ t2[(x >> 104) & 0xff] ^ t1[(x >> 112) & 0xff] ^ t0[(x >> 120) & 0xff]
+        for octet in in_data[stop:]:
+            register = t0[(register ^ octet) & 0xff] ^ (register >> 8)
+        return register
+
+
+    # function slice_by
+    ###############################################################################
+    def slice_by(self, in_data, slices = 8, start = 0, end = None, encoding = "latin-1"):
+        """
+        The slice-by-N CRC algorithm, with N = 4, 8 or 16.
+        The other parameters are the same as for bit_by_bit.
+        """
+        register = self.slice_by_update(self.init_register(), in_data, slices, start, end, encoding)
+        return self.finalize_register(register)
+
+
+    # function native_update
+    ###############################################################################
+    def native_update(self, register, in_data, slices = None, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the register (see init_register) with the native CRC routine of
+        the standard library which uses the same Width and Poly, if any (see
+        NATIVE_CRCS).  XorIn, ReflectOut and XorOut are applied outside of the
+        native routine; if ReflectIn differs from it, the octets and the
+        register are reflected.  Otherwise, the slice_by algorithm with the
+        given number of slices is used, or python_update if slices is None.
+        The other parameters are the same as for slice_by_update.
+        """
+        if self.Native == None:
+            if slices == None:
+                return self.python_update(register, in_data, start, end, encoding)
+            return self.slice_by_update(register, in_data, slices, start, end, encoding)
+
+        width, poly, reflected, xor, func = self.Native
+        if self.ReflectIn != reflected:
+            register = self.reflect(register, self.Width)
+        register ^= xor
+        if self.ReflectIn == reflected:
+            for chunk in octet_chunks(in_data, start, end, encoding):
+                register = func(chunk, register)
         else:
-            register = self.reflect(register, self.Width + self.CrcShift) << self.CrcShift
-            for octet in in_data:
-                tblidx = ((register >> self.CrcShift) ^ octet) & 0xff
-                register = ((register >> self.TableIdxWidth) ^ tbl[tblidx]) & (self.Mask << self.CrcShift)
-            register = self.reflect(register, self.Width + self.CrcShift) & self.Mask
+            for block in octet_blocks(in_data, start, end, encoding, True):
+                register = func(block, register)
+        register ^= xor
+        if self.ReflectIn != reflected:
+            register = self.reflect(register, self.Width)
+        return register
+
+
+    # function native
+    ###############################################################################
+    def native(self, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Calculate the CRC with the native CRC routine of the standard library,
+        if there is one for this Width and Poly, and with python_update
+        otherwise (see native_update).
+        The parameters are the same as for bit_by_bit.
+        """
+        register = self.native_update(self.init_register(), in_data, None, start, end, encoding)
+        return self.finalize_register(register)
+
+
+    # function python_update
+    ###############################################################################
+    def python_update(self, register, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the register (see init_register) with the fastest pure Python
+        algorithm for the size of the data: chunks of at least
+        LONG_DIVISION_MIN_SIZE octets are processed with long_division_update,
+        shorter chunks with table_driven_update.
+        The other parameters are the same as for bit_by_bit.
+        """
+        for chunk in octet_chunks(in_data, start, end, encoding):
+            if len(chunk) >= LONG_DIVISION_MIN_SIZE:
+                register = self.long_division_update(register, chunk)
+            else:
+                register = self.table_driven_update(register, chunk)
+        return register
+
+
+    # function gen_long_division_schedule
+    ###############################################################################
+    def gen_long_division_schedule(self, bits):
+        """
+        This function generates the folding steps of the long_division
+        algorithm for a dividend of bits bits, as a list of tuples (k, mask,
+        shifts).  Each step splits the dividend D into H * x^k + L, with L =
+        D & mask, and replaces it with H * (x^k mod Poly) + L, which has the
+        same remainder; shifts are the exponents of the terms of x^k mod Poly.
+        k is a multiple of 8 close to half the length of the dividend, so each
+        step roughly halves it, until it is less than about 2 * Width bits.
+        """
+        schedule = []
+        while True:
+            k = (bits // 16) * 8
+            if k <= self.Width:
+                break
+            op = self.shift_operator(k // 8)
+            shifts = tuple(i for i in range(self.Width) if (op >> i) & 0x01)
+            schedule.append((k, (1 << k) - 1, shifts))
+            bits = max(k, bits - k + self.Width)
+        return schedule
+
+
+    # function long_division_update
+    ###############################################################################
+    def long_division_update(self, register, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the register (see init_register) with the long division
+        algorithm.  Each block of SLICE_BLOCK_SIZE octets is converted into
+        one integer with int.from_bytes, and the register is computed as the
+        remainder of (register * x^(8 * n) + block * x^Width) / Poly.  The
+        division folds the upper half of the dividend into the lower half
+        with shifts and xors of big integers (see gen_long_division_schedule),
+        so most of the work is done by the big integer routines of the
+        interpreter instead of a loop over the octets.
+
+        The message is in_data[start:end]; see octet_chunks for the accepted
+        types of in_data and the meaning of encoding.
+        """
+        width = self.Width
+        poly = (self.Poly & self.Mask) | (1 << width)
+        from_bytes = int.from_bytes
+        if self.ReflectIn:
+            register = self.reflect(register, width)
+        # The octets of the reflected algorithms are reflected, so the
+        # division operates on an unreflected message.
+        # The schedule of a full block also reduces shorter dividends, as the
+        # steps with k above the length of the dividend do nothing.
+        key = (width, self.Poly & self.Mask, "long-division", SLICE_BLOCK_SIZE)
+        schedule = table_cache.get(key, lambda: self.gen_long_division_schedule(8 * SLICE_BLOCK_SIZE + width))
+        for block in octet_blocks(in_data, start, end, encoding, self.ReflectIn):
+            bits = 8 * len(block)
+            dividend = (register << bits) ^ (from_bytes(block, "big") << width)
+            for (k, mask, shifts) in schedule:
+                high = dividend >> k
+                if high:
+                    dividend &= mask
+                    for i in shifts:
+                        dividend ^= high << i
+            length = dividend.bit_length()
+            while length > width:
+                dividend ^= poly << (length - width - 1)
+                length = dividend.bit_length()
+            register = dividend
+        if self.ReflectIn:
+            register = self.reflect(register, width)
+        return register
+
+
+    # function long_division
+    ###############################################################################
+    def long_division(self, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        The long division CRC algorithm (see long_division_update).
+        The parameters are the same as for bit_by_bit.
+        """
+        register = self.long_division_update(self.init_register(), in_data, start, end, encoding)
+        return self.finalize_register(register)
+
+
+    # function bits_update
+    ###############################################################################
+    def bits_update(self, register, in_data, bit_length, slices = None):
+        """
+        Update the register (see init_register) with the first bit_length bits
+        of in_data, for messages whose length is not a multiple of 8 bits.
+        The whole octets are processed with native_update; the remaining 1 to
+        7 bits of the last octet are fed into the register one at a time,
+        starting with the most significant bit of the octet, or with the least
+        significant bit if ReflectIn is set.
+
+        in_data is an object which supports the buffer protocol or a str of
+        characters in the range 0-255 (see octet_chunks).
+        """
+        octets, bits = divmod(bit_length, 8)
+        last = octets + (1 if bits else 0)
+        if bit_length < 0:
+            raise ValueError("negative bit length: %d" % bit_length)
+        tail = b"".join(chunk.tobytes() for chunk in octet_chunks(in_data, max(last - 1, 0), last))
+        if len(tail) != min(last, 1):
+            raise ValueError("the message is shorter than %d bits" % bit_length)
+        register = self.native_update(register, in_data, slices, 0, octets)
+        if bits:
+            register = self.__bits_update(register, tail[0], bits)
+        return register
+
+
+    # function __bits_update
+    ###############################################################################
+    def __bits_update(self, register, octet, count):
+        """
+        Update the register with the first count bits of octet, one bit at a
+        time.
+        """
+        if self.ReflectIn:
+            poly = self.reflect(self.Poly, self.Width)
+            for i in range(count):
+                bit = (register ^ (octet >> i)) & 0x01
+                register >>= 1
+                if bit:
+                    register ^= poly
+        else:
+            for i in range(count):
+                bit = (register >> (self.Width - 1)) ^ ((octet >> (7 - i)) & 0x01)
+                register = (register << 1) & self.Mask
+                if bit:
+                    register ^= self.Poly & self.Mask
+        return register
+
+
+    # function bits
+    ###############################################################################
+    def bits(self, in_data, bit_length, slices = None):
+        """
+        Calculate the CRC of the first bit_length bits of in_data (see
+        bits_update).
+        """
+        register = self.bits_update(self.init_register(), in_data, bit_length, slices)
+        return self.finalize_register(register)
+
+
+    # function mul_mod
+    ###############################################################################
+    def mul_mod(self, a, b):
+        """
+        Return the product of the unreflected polynomials a and b modulo the
+        generator polynomial.
+        """
+        product = 0
+        while b:
+            if b & 0x01:
+                product ^= a
+            b >>= 1
+            topbit = a & self.MSB_Mask
+            a = (a << 1) & self.Mask
+            if topbit:
+                a ^= self.Poly
+        return product
+
+
+    # function gen_shift_operators
+    ###############################################################################
+    def gen_shift_operators(self, count = 64):
+        """
+        This function generates the operators x^(8 * 2^k) mod Poly for
+        k = 0 .. count - 1.  Multiplying an unreflected register with the k-th
+        operator is equivalent to feeding 2^k zero octets into the register.
+        """
+        op = 1
+        for i in range(8):
+            topbit = op & self.MSB_Mask
+            op = (op << 1) & self.Mask
+            if topbit:
+                op ^= self.Poly
+        ops = [op]
+        for k in range(1, count):
+            ops.append(self.mul_mod(ops[-1], ops[-1]))
+        return ops
+
+
+    # function shift_operator
+    ###############################################################################
+    def shift_operator(self, length):
+        """
+        Return x^(8 * length) mod Poly.  Multiplying an unreflected register
+        with this operator (see mul_mod) is equivalent to feeding length zero
+        octets into the register.
+        """
+        if length < 0:
+            raise ValueError("negative length: %d" % length)
+        ops = table_cache.get((self.Width, self.Poly & self.Mask, "shift-operators"), self.gen_shift_operators)
+        result = 1
+        k = 0
+        while length:
+            if k < len(ops):
+                op = ops[k]
+            else:
+                op = self.mul_mod(op, op)
+            if length & 0x01:
+                result = self.mul_mod(result, op)
+            length >>= 1
+            k += 1
+        return result
+
+
+    # function zeros_update
+    ###############################################################################
+    def zeros_update(self, register, count):
+        """
+        Update the register (see init_register) with count zero octets.
+
+        The calculation takes O(log(count)) multiplications modulo the
+        polynomial with the cached shift operators (see shift_operator).
+        """
+        if count < 0:
+            raise ValueError("negative count: %d" % count)
+        if count == 0:
+            return register
+        if self.ReflectIn:
+            register = self.reflect(register, self.Width)
+        register = self.mul_mod(register, self.shift_operator(count))
+        if self.ReflectIn:
+            register = self.reflect(register, self.Width)
+        return register
+
+
+    # function repeat_update
+    ###############################################################################
+    def repeat_update(self, register, pattern, count, slices = None):
+        """
+        Update the register (see init_register) with count repetitions of
+        pattern.  See octet_chunks for the accepted types of pattern.
+
+        Feeding the pattern into a register r yields r * x^(8 * len(pattern))
+        + c, where c is the register after feeding the pattern into a zero
+        register.  This affine map is raised to the power count by repeated
+        squaring, which takes O(log(count)) multiplications modulo the
+        polynomial.
+        """
+        if count < 0:
+            raise ValueError("negative count: %d" % count)
+        pattern = b"".join(chunk.tobytes() for chunk in octet_chunks(pattern))
+        if count == 0 or len(pattern) == 0:
+            return register
+        step = self.native_update(0, pattern, slices)
+        op = self.shift_operator(len(pattern))
+        if self.ReflectIn:
+            register = self.reflect(register, self.Width)
+            step = self.reflect(step, self.Width)
+        while True:
+            if count & 0x01:
+                register = self.mul_mod(register, op) ^ step
+            count >>= 1
+            if not count:
+                break
+            step = self.mul_mod(step, op) ^ step
+            op = self.mul_mod(op, op)
+        if self.ReflectIn:
+            register = self.reflect(register, self.Width)
+        return register
+
+
+    # function combine
+    ###############################################################################
+    def combine(self, crc_a, crc_b, len_b):
+        """
+        Return the CRC of the concatenation of two messages A and B, given the
+        CRC values of A and B and the length of B in octets.
 
+        The calculation takes O(log(len_b)) multiplications modulo the
+        polynomial and does not need the data of A or B.
+        """
+        if len_b < 0:
+            raise ValueError("negative length: %d" % len_b)
+        if self.ReflectOut:
+            crc_a = self.reflect(crc_a ^ self.XorOut, self.Width)
+            crc_b = self.reflect(crc_b ^ self.XorOut, self.Width)
+        else:
+            crc_a ^= self.XorOut
+            crc_b ^= self.XorOut
+        # Both registers started from DirectInit; the initial value is
+        # cancelled out of B by shifting it along with A.
+        register = self.mul_mod(crc_a ^ self.DirectInit, self.shift_operator(len_b)) ^ crc_b
         if self.ReflectOut:
             register = self.reflect(register, self.Width)
         return register ^ self.XorOut
 
+
+# Class CrcHash
+###############################################################################
+class CrcHash(object):
+    """
+    An incremental CRC calculation with an interface similar to the one of the
+    hashlib module.  The register is kept between calls to update(), so the
+    message can be passed in pieces of any size.
+    """
+
+    # Class constructor
+    ###############################################################################
+    def __init__(self, crc, name = None, slices = None):
+        """The CrcHash constructor.
+
+        The parameters are as follows:
+            crc         the Crc object which defines the parameters of the CRC
+            name        the name of the model, if any
+            slices      the number of octets processed at a time by the
+                        slice_by algorithm; if None, the native CRC routine
+                        of the standard library is used where possible and
+                        Crc.python_update otherwise (see Crc.native_update)
+        """
+        self.Crc            = crc
+        self.name           = name
+        self.digest_size    = (crc.Width + 7) // 8
+        self.Slices         = slices
+        self.__register     = crc.init_register()
+
+
+    # function update
+    ###############################################################################
+    def update(self, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the CRC with the octets of in_data[start:end].  See octet_chunks
+        for the accepted types of in_data.
+        """
+        if self.Slices == None:
+            self.__register = self.Crc.native_update(self.__register, in_data, None, start, end, encoding)
+        else:
+            self.__register = self.Crc.slice_by_update(self.__register, in_data, self.Slices, start, end, encoding)
+
+
+    # function update_zeros
+    ###############################################################################
+    def update_zeros(self, count):
+        """
+        Update the CRC with count zero octets (see Crc.zeros_update).
+        """
+        self.__register = self.Crc.zeros_update(self.__register, count)
+
+
+    # function update_repeat
+    ###############################################################################
+    def update_repeat(self, pattern, count):
+        """
+        Update the CRC with count repetitions of pattern (see
+        Crc.repeat_update).
+        """
+        self.__register = self.Crc.repeat_update(self.__register, pattern, count, 8 if self.Slices == None else self.Slices)
+
+
+    # function copy
+    ###############################################################################
+    def copy(self):
+        """
+        Return a copy of this object.  The copy can be updated independently,
+        e.g. to calculate the CRC of several messages with a common prefix.
+        """
+        other = CrcHash(self.Crc, self.name, self.Slices)
+        other.__register = self.__register
+        return other
+
+
+    # property crcValue
+    ###############################################################################
+    @property
+    def crcValue(self):
+        """
+        The CRC of the data passed so far to update().
+        """
+        return self.Crc.finalize_register(self.__register)
+
+
+    # function digest
+    ###############################################################################
+    def digest(self):
+        """
+        Return the CRC value as a big-endian bytes object.
+        """
+        return self.crcValue.to_bytes(self.digest_size, "big")
+
+
+    # function hexdigest
+    ###############################################################################
+    def hexdigest(self):
+        """
+        Return the CRC value as a string of hexadecimal digits.
+        """
+        return "%0*x" % (2 * self.digest_size, self.crcValue)
+
+
+# Class CrcMultiHash
+###############################################################################
+class CrcMultiHash(object):
+    """
+    The CRCs of several models, calculated in a single pass over the message.
+
+    Models with the same Width, Poly and ReflectIn share one register, which
+    starts from zero.  The initial value of each model is shifted over the
+    length of the message only when its CRC is requested (see
+    Crc.zeros_update), and then its XorOut and ReflectOut are applied.
+    """
+
+    # Class constructor
+    ###############################################################################
+    def __init__(self, crcs, names = None, slices = None):
+        """The CrcMultiHash constructor.
+
+        The parameters are as follows:
+            crcs        the list of Crc objects which define the models
+            names       the list of the names of the models, if any
+            slices      the number of octets processed at a time by the
+                        slice_by algorithm, as for CrcHash
+        """
+        self.Crcs           = list(crcs)
+        self.names          = names
+        self.Slices         = slices
+        self.Length         = 0
+        # The shared registers, as lists of [Crc, register].
+        self.__groups       = OrderedDict()
+        for crc in self.Crcs:
+            key = (crc.Width, crc.Poly & crc.Mask, crc.ReflectIn)
+            if key not in self.__groups:
+                self.__groups[key] = [Crc(width = crc.Width, poly = crc.Poly,
+                        reflect_in = crc.ReflectIn, xor_in = 0,
+                        reflect_out = crc.ReflectIn, xor_out = 0), 0]
+
+
+    # function update
+    ###############################################################################
+    def update(self, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Update the CRCs with the octets of in_data[start:end].  See octet_chunks
+        for the accepted types of in_data.  Each chunk of the message is
+        passed to the shared registers in turn.
+        """
+        groups = list(self.__groups.values())
+        for chunk in octet_chunks(in_data, start, end, encoding):
+            self.Length += len(chunk)
+            for group in groups:
+                if self.Slices == None:
+                    group[1] = group[0].native_update(group[1], chunk)
+                else:
+                    group[1] = group[0].slice_by_update(group[1], chunk, self.Slices)
+
+
+    # property crcValues
+    ###############################################################################
+    @property
+    def crcValues(self):
+        """
+        The list of the CRCs of the data passed so far to update(), in the
+        order of the models.
+        """
+        values = []
+        for crc in self.Crcs:
+            register = self.__groups[(crc.Width, crc.Poly & crc.Mask, crc.ReflectIn)][1]
+            register ^= crc.zeros_update(crc.init_register(), self.Length)
+            values.append(crc.finalize_register(register))
+        return values
+
+
+# Class CrcRolling
+###############################################################################
+class CrcRolling(object):
+    """
+    A rolling CRC over the last Window octets of a stream, e.g. to find the
+    boundaries of content-defined chunks.
+
+    Each octet which enters the window is fed into a zero-initialised,
+    reflected register with the first slice-by-N table; the contribution of
+    the octet which leaves the window is removed with one lookup in the
+    table of Crc.get_rolling_table.  Until Window octets have been passed,
+    the window is padded with leading zero octets.
+    """
+
+    # Class constructor
+    ###############################################################################
+    def __init__(self, crc, window):
+        """The CrcRolling constructor.
+
+        The parameters are as follows:
+            crc         the Crc object which defines the parameters of the CRC
+            window      the number of octets in the window
+        """
+        if window < 1:
+            raise ValueError("invalid window size: %d" % window)
+        self.Crc            = crc
+        self.Window         = window
+        self.Offset         = 0
+        self.Register       = 0
+        self.__table        = crc.get_slice_tables(8)[0]
+        self.__out_table    = crc.get_rolling_table(window)
+        self.__history      = bytes(window)
+        # The initial value of the register, shifted through a full window.
+        self.__init         = crc.zeros_update(crc.init_register(), window)
+
+
+    # function __roll
+    ###############################################################################
+    def __roll(self, block, mask, match):
+        """
+        Slide the window over the reflected octets of block and return the
+        offsets after each octet at which Register & mask == match.
+        """
+        t0 = self.__table
+        out = self.__out_table
+        register = self.Register
+        offset = self.Offset
+        matches = []
+        buf = self.__history + block
+        if mask == None:
+            for (old, new) in zip(buf, buf[self.Window:]):
+                register = t0[(register ^ new) & 0xff] ^ (register >> 8) ^ out[old]
+        else:
+            for (i, (old, new)) in enumerate(zip(buf, buf[self.Window:]), offset + 1):
+                register = t0[(register ^ new) & 0xff] ^ (register >> 8) ^ out[old]
+                if register & mask == match:
+                    matches.append(i)
+        self.Register = register
+        self.Offset = offset + len(block)
+        self.__history = buf[-self.Window:]
+        return matches
+
+
+    # function update
+    ###############################################################################
+    def update(self, in_data, start = 0, end = None, encoding = "latin-1"):
+        """
+        Slide the window over the octets of in_data[start:end].  See
+        octet_chunks for the accepted types of in_data.
+        """
+        for block in octet_blocks(in_data, start, end, encoding, not self.Crc.ReflectIn):
+            self.__roll(block, None, None)
+
+
+    # function scan
+    ###############################################################################
+    def scan(self, in_data, mask, match = None, start = 0, end = None, encoding = "latin-1"):
+        """
+        Slide the window over the octets of in_data[start:end] and yield the
+        stream offsets after each octet at which the reflected register
+        matches, i.e. Register & mask == match.  match defaults to mask; a
+        match of zero would report every octet of a run of zeros.
+
+        The object is updated one block of SLICE_BLOCK_SIZE octets at a time,
+        before the offsets of the block are yielded.
+        """
+        if match == None:
+            match = mask
+        for block in octet_blocks(in_data, start, end, encoding, not self.Crc.ReflectIn):
+            for offset in self.__roll(block, mask, match):
+                yield offset
+
+
+    # property crcValue
+    ###############################################################################
+    @property
+    def crcValue(self):
+        """
+        The CRC of the octets in the window, as calculated by Crc.
+        """
+        register = self.Register
+        if not self.Crc.ReflectIn:
+            register = self.Crc.reflect(register, self.Crc.Width)
+        return self.Crc.finalize_register(register ^ self.__init)
+
+
+# function new
+###############################################################################
+def new(model, in_data = None):
+    """
+    Return a new CrcHash object for model, which is either the name of one of
+    the models in crc_models.CrcModels or a Crc object.  If in_data is given,
+    the object is updated with it.
+    """
+    if isinstance(model, Crc):
+        h = CrcHash(model)
+    else:
+        params = CrcModels().getParams(model)
+        if params == None:
+            raise ValueError("unsupported CRC model %s" % model)
+        crc = Crc(width = params['width'], poly = params['poly'],
+                reflect_in = params['reflect_in'], xor_in = params['xor_in'],
+                reflect_out = params['reflect_out'], xor_out = params['xor_out'])
+        h = CrcHash(crc, params['name'])
+    if in_data != None:
+        h.update(in_data)
+    return h
+
+
+# function new_multi
+###############################################################################
+def new_multi(models, in_data = None):
+    """
+    Return a new CrcMultiHash object for a list of models, each of which is
+    given as for new().  If in_data is given, the object is updated with it.
+    """
+    hashes = [new(model) for model in models]
+    h = CrcMultiHash([hash.Crc for hash in hashes], [hash.name for hash in hashes])
+    if in_data != None:
+        h.update(in_data)
+    return h
+
+
+# function prewarm_table_cache
+###############################################################################
+def prewarm_table_cache(table_idx_width = 8, slices = (4, 8, 16)):
+    """
+    Generate the tables of the table-driven algorithm with the given index
+    width and of the slice_by algorithms with the given numbers of slices for
+    all models in crc_models.CrcModels, and store them in the on-disk cache.
+    Tables which are already in the cache are validated and kept.  Tables
+    which are taken from memory or from the frozen table module are written
+    to the on-disk cache as well.  Return the names of the table files; raise
+    IOError if no table file could be written.
+    """
+    if table_cache.Directory == None:
+        raise ValueError("the table cache has no directory")
+    files = set()
+    for params in CrcModels().models:
+        crc = Crc(width = params['width'], poly = params['poly'],
+                reflect_in = params['reflect_in'], xor_in = params['xor_in'],
+                reflect_out = params['reflect_out'], xor_out = params['xor_out'],
+                table_idx_width = table_idx_width)
+        tables = [((crc.Width, crc.Poly & crc.Mask, crc.ReflectIn, crc.TableIdxWidth), crc.get_table())]
+        for n in slices:
+            tables.append(((crc.Width, crc.Poly & crc.Mask, "slice-by", n), crc.get_slice_tables(n)))
+        for (key, tbl) in tables:
+            filename = table_cache.table_file(key)
+            if os.path.exists(filename) or write_table_file(filename, tbl):
+                files.add(filename)
+    if len(files) == 0:
+        raise IOError("no table files written to %s" % table_cache.Directory)
+    return sorted(files)
@@ -0,0 +1,183 @@
+#  pycrc -- parameterisable CRC calculation utility and C source code generator
+#
+#  Copyright (c) 2006-2013  Thomas Pircher  <tehpeh@gmx.net>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+#  IN THE SOFTWARE.
+
+
+
+
+"""
+Generator of the frozen table module crc_frozen.
+
+The module crc_frozen holds the precomputed constants and lookup tables of all
+models in crc_models.CrcModels.  It is generated and byte-compiled at build
+time, so that importing it only loads the constants from the .pyc file:
+
+   python crc_freeze.py -o crc_frozen.py
+
+If crc_frozen can be imported, Crc objects with the parameters of one of the
+models take their constants from it, and the table cache takes the tables
+from it instead of calculating them.  Other models are not affected.
+
+The module can also be generated from within Python:
+
+   from crc_freeze import gen_frozen_source
+
+   print(gen_frozen_source(table_idx_width = 8, slices = (4, 8)))
+"""
+
+from optparse import OptionParser
+from crc_models import CrcModels
+import crc_algorithms
+import os
+import py_compile
+import sys
+
+
+# The number of table entries per line.
+ENTRIES_PER_LINE = 8
+
+
+# function format_values
+###############################################################################
+def format_values(values, width, indent):
+    """
+    Return the lines of the values as hexadecimal numbers, separated by commas.
+    """
+    digits = (width + 3) // 4
+    lines = []
+    for i in range(0, len(values), ENTRIES_PER_LINE):
+        lines.append(indent + " ".join("0x%0*x," % (digits, v) for v in values[i:i + ENTRIES_PER_LINE]))
+    return lines
+
+
+# function gen_frozen_source
+###############################################################################
+def gen_frozen_source(table_idx_width = 8, slices = (8, )):
+    """
+    Return the source of the frozen table module for all models in
+    crc_models.CrcModels, with the table of the table-driven algorithm for
+    the given index width and the tables of the slice_by algorithm for the
+    given numbers of slices.
+    """
+    # Calculate the values afresh, even if a frozen module is installed.
+    frozen = crc_algorithms.crc_frozen
+    crc_algorithms.crc_frozen = None
+    try:
+        models = []
+        tables = []
+        keys = set()
+        for m in CrcModels().models:
+            crc = crc_algorithms.Crc(width = m['width'], poly = m['poly'],
+                    reflect_in = m['reflect_in'], xor_in = m['xor_in'],
+                    reflect_out = m['reflect_out'], xor_out = m['xor_out'],
+                    table_idx_width = table_idx_width)
+            params = (crc.Width, crc.Poly, crc.ReflectIn, crc.XorIn, crc.ReflectOut, crc.XorOut)
+            if params in [p for (names, p, c) in models]:
+                [names for (names, p, c) in models if p == params][0].append(m['name'])
+            else:
+                models.append(([m['name']], params, crc))
+            key = (crc.Width, crc.Poly & crc.Mask, crc.ReflectIn, crc.TableIdxWidth)
+            if key not in keys:
+                keys.add(key)
+                tables.append((key, crc.Width + crc.CrcShift, [list(crc.gen_table())]))
+            for n in slices:
+                key = (crc.Width, crc.Poly & crc.Mask, "slice-by", n)
+                if key not in keys:
+                    keys.add(key)
+                    tables.append((key, crc.Width, [list(t) for t in crc.gen_slice_tables(n)]))
+    finally:
+        crc_algorithms.crc_frozen = frozen
+
+    out = []
+    out.append("# Generated by crc_freeze.py from crc_models.CrcModels; do not edit.")
+    out.append("")
+    out.append("VERSION = %d" % crc_algorithms.FROZEN_VERSION)
+    out.append("")
+    out.append("# The constants of the models, keyed by")
+    out.append("# (Width, Poly, ReflectIn, XorIn, ReflectOut, XorOut), as tuples of")
+    out.append("# (MSB_Mask, Mask, DirectInit, NonDirectInit, CrcShift).")
+    out.append("MODELS = {")
+    for names, params, crc in models:
+        out.append("    # %s" % ", ".join(names))
+        out.append("    (%d, 0x%x, %s, 0x%x, %s, 0x%x): (0x%x, 0x%x, 0x%x, 0x%x, %d)," % (params +
+                (crc.MSB_Mask, crc.Mask, crc.DirectInit, crc.NonDirectInit, crc.CrcShift)))
+    out.append("}")
+    out.append("")
+    out.append("# The lookup tables, keyed by the keys of crc_algorithms.table_cache, as")
+    out.append("# tuples of (the width of the entries, entries).  The entries of the slice-by")
+    out.append("# tables are tuples of tables.")
+    out.append("TABLES = {")
+    for key, width, values in tables:
+        out.append("    (%d, 0x%x, %s): (%d, (" % (key[0], key[1], ", ".join(repr(k) for k in key[2:]), width))
+        if len(values) == 1:
+            out += format_values(values[0], width, " " * 8)
+        else:
+            for v in values:
+                out.append("        (")
+                out += format_values(v, width, " " * 12)
+                out.append("        ),")
+        out.append("    )),")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+# main function
+###############################################################################
+def main():
+    """
+    Main function.
+    """
+    parser = OptionParser(usage = "python %prog [OPTIONS]")
+    parser.add_option("-o", "--output",
+                    action="store", type="string", dest="output_file",
+                    default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "crc_frozen.py"),
+                    help="write the module to FILE; defaults to crc_frozen.py next to this script", metavar="FILE")
+    parser.add_option("--table-idx-width",
+                    action="store", type="int", dest="table_idx_width", default=8,
+                    help="use NUM bits to index the table of the table-driven algorithm", metavar="NUM")
+    parser.add_option("--slices",
+                    action="store", type="string", dest="slices", default="8",
+                    help="comma separated list of the slice-by-N tables to include", metavar="LIST")
+    (options, args) = parser.parse_args()
+    if not 1 <= options.table_idx_width <= 16:
+        sys.stderr.write("%s: error: unsupported table-idx-width %d\n" % (sys.argv[0], options.table_idx_width))
+        return 1
+    slices = [int(n) for n in options.slices.split(",") if n]
+
+    source = gen_frozen_source(options.table_idx_width, slices)
+    try:
+        out_file = open(options.output_file, "w")
+        out_file.write(source)
+        out_file.close()
+    except IOError:
+        sys.stderr.write("%s: error: cannot write to file %s\n" % (sys.argv[0], options.output_file))
+        return 1
+    try:
+        py_compile.compile(options.output_file, doraise = True)
+    except py_compile.PyCompileError as e:
+        sys.stderr.write("%s: error: cannot compile %s: %s\n" % (sys.argv[0], options.output_file, e))
+        return 1
+    return 0
+
+
+# program entry point
+if __name__ == "__main__":
+    sys.exit(main())
@@ -316,6 +316,16 @@ class CrcModels(object):
         'xor_out':       0xffffffffffffffff,
         'check':         0x995dc9bbdf1939fa,
     })
+    models.append({
+        'name':         'crc-82-darc',
+        'width':         82,
+        'poly':          0x0308c0111011401440411,
+        'reflect_in':    True,
+        'xor_in':        0x0,
+        'reflect_out':   True,
+        'xor_out':       0x0,
+        'check':         0x09ea83f625023801fd612,
+    })
 
 
     # function getList
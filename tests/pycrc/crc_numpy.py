@@ -0,0 +1,257 @@
+#  pycrc -- parameterisable CRC calculation utility and C source code generator
+#
+#  Copyright (c) 2006-2013  Thomas Pircher  <tehpeh@gmx.net>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+#  IN THE SOFTWARE.
+
+
+
+
+"""
+Vectorised CRC calculation with NumPy.
+
+NumPy is optional.  If it is not installed, or if the Width of the CRC is
+larger than 64 bits, the functions of this module fall back to the pure
+Python implementation in crc_algorithms.
+
+Example:
+
+   import numpy
+   from crc_algorithms import Crc
+   from crc_numpy import batch_crc
+
+   crc = Crc(width = 16, poly = 0x8005,
+             reflect_in = True, xor_in = 0xffff,
+             reflect_out = True, xor_out = 0x0000)
+   frames = numpy.frombuffer(data, dtype = numpy.uint8).reshape(-1, 64)
+   print(batch_crc(crc, frames))
+   print(lanes_crc(crc, data))
+"""
+
+from crc_algorithms import Crc, REFLECTED_OCTETS, octet_chunks, table_cache
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The number of octets of each lane of the lane-parallel algorithm.
+LANE_LENGTH = 64
+
+
+# function use_numpy
+###############################################################################
+def use_numpy(crc):
+    """
+    Return True if the vectorised NumPy code can be used for crc.
+    """
+    return numpy is not None and crc.Width <= 64
+
+
+# function get_table
+###############################################################################
+def get_table(crc):
+    """
+    Return the table of the table-driven algorithm, with an index width of 8
+    bits, as a NumPy array.  For reflected algorithms, the entries are not
+    shifted by CrcShift.
+    """
+    if crc.TableIdxWidth != 8:
+        crc = Crc(width = crc.Width, poly = crc.Poly,
+                reflect_in = crc.ReflectIn, xor_in = crc.XorIn,
+                reflect_out = crc.ReflectOut, xor_out = crc.XorOut,
+                table_idx_width = 8)
+    tbl = numpy.array(crc.get_table(), dtype = numpy.uint64)
+    if crc.ReflectIn:
+        tbl >>= numpy.uint64(crc.CrcShift)
+    return tbl
+
+
+# function reflect_array
+###############################################################################
+def reflect_array(data, width):
+    """
+    Reflect every element of a uint64 array over width bits.
+    """
+    octets = data.astype("<u8").view(numpy.uint8).reshape(-1, 8)
+    octets = numpy.frombuffer(REFLECTED_OCTETS, dtype = numpy.uint8)[octets[:, ::-1]]
+    return numpy.ascontiguousarray(octets).view("<u8").ravel() >> numpy.uint64(64 - width)
+
+
+# function finalize_array
+###############################################################################
+def finalize_array(crc, register):
+    """
+    The vectorised counterpart of Crc.finalize_register.
+    """
+    if crc.ReflectIn != crc.ReflectOut:
+        register = reflect_array(register, crc.Width)
+    return register ^ numpy.uint64(crc.XorOut)
+
+
+# function update_rows
+###############################################################################
+def update_rows(crc, register, messages):
+    """
+    Update a uint64 array of registers (see Crc.init_register), one per row
+    of the 2-D uint8 array messages, with the table-driven algorithm.  The
+    table recurrence runs column by column, vectorised over all rows.
+    """
+    tbl = get_table(crc)
+    if crc.ReflectIn:
+        shift = numpy.uint64(8)
+        for i in range(messages.shape[1]):
+            register = tbl[(register ^ messages[:, i]) & numpy.uint64(0xff)] ^ (register >> shift)
+        return register
+
+    # Non-reflected algorithms of a Width below 8 bits operate on a register
+    # shifted by CrcShift, as in Crc.table_driven.
+    crc_shift = numpy.uint64(crc.CrcShift)
+    mask = numpy.uint64((crc.Mask << crc.CrcShift))
+    top = numpy.uint64(crc.Width + crc.CrcShift - 8)
+    shift = numpy.uint64(8)
+    register = register << crc_shift
+    for i in range(messages.shape[1]):
+        register = tbl[((register >> top) ^ messages[:, i]) & numpy.uint64(0xff)] ^ ((register << shift) & mask)
+    return register >> crc_shift
+
+
+# function batch_crc
+###############################################################################
+def batch_crc(crc, messages):
+    """
+    Return the CRCs of many messages of the same length.
+
+    messages is a 2-D uint8 NumPy array with one message per row; the result
+    is a uint64 array with one CRC per row.  Without NumPy, messages can be
+    any sequence of bytes-like objects and a list is returned.
+    """
+    if not use_numpy(crc):
+        return [crc.slice_by(bytes(bytearray(row))) for row in messages]
+    messages = numpy.asarray(messages, dtype = numpy.uint8)
+    register = numpy.full(messages.shape[0], crc.init_register(), dtype = numpy.uint64)
+    return finalize_array(crc, update_rows(crc, register, messages))
+
+
+# function gen_mul_tables
+###############################################################################
+def gen_mul_tables(crc, op):
+    """
+    This function generates the tables to multiply unreflected registers with
+    the constant polynomial op modulo Poly.  Table j holds the products of
+    the octet values at bit position 8 * j of the register.
+    """
+    idx = numpy.arange(256)
+    tables = numpy.zeros(((crc.Width + 7) // 8, 256), dtype = numpy.uint64)
+    for k in range(crc.Width):
+        tables[k // 8, (idx & (1 << (k % 8))) != 0] ^= numpy.uint64(crc.mul_mod(1 << k, op))
+    return tables
+
+
+# function mul_array
+###############################################################################
+def mul_array(tables, register):
+    """
+    Multiply every unreflected register of a uint64 array with the constant
+    polynomial of tables (see gen_mul_tables).
+    """
+    result = numpy.zeros_like(register)
+    for j in range(len(tables)):
+        result ^= tables[j][(register >> numpy.uint64(8 * j)) & numpy.uint64(0xff)]
+    return result
+
+
+# function lanes_update
+###############################################################################
+def lanes_update(crc, register, in_data, lanes = 4096, start = 0, end = None, encoding = "latin-1"):
+    """
+    Update the register (see Crc.init_register) with the lane-parallel
+    algorithm.
+
+    The data is split into groups of lanes blocks of LANE_LENGTH octets,
+    which are processed in lockstep by update_rows.  The first block of a
+    group starts from register, the others from zero; the block registers
+    are then folded pairwise into a single register by multiplying with
+    x^(8 * length) mod Poly.  As the block length is fixed, the same few
+    multiplication tables are used for all data.  Octets which do not fill
+    a whole group are processed with fewer lanes, and the last octets by
+    Crc.slice_by_update.
+
+    The message is in_data[start:end]; see crc_algorithms.octet_chunks for the
+    accepted types of in_data and the meaning of encoding.
+    """
+    for chunk in octet_chunks(in_data, start, end, encoding):
+        register = lanes_update_chunk(crc, register, chunk, lanes)
+    return register
+
+
+# function lanes_update_chunk
+###############################################################################
+def lanes_update_chunk(crc, register, in_data, lanes):
+    """
+    Update the register with the octets of the memoryview in_data (see
+    lanes_update).
+    """
+    if not use_numpy(crc):
+        return crc.slice_by_update(register, in_data)
+
+    offset = 0
+    while lanes > 1:
+        size = lanes * LANE_LENGTH
+        while len(in_data) - offset >= size:
+            register = lanes_update_group(crc, register, in_data[offset:offset + size], lanes)
+            offset += size
+        lanes //= 2
+    return crc.slice_by_update(register, in_data[offset:])
+
+
+# function lanes_update_group
+###############################################################################
+def lanes_update_group(crc, register, in_data, lanes):
+    """
+    Update the register with one group of lanes blocks of LANE_LENGTH octets
+    (see lanes_update).
+    """
+    columns = numpy.frombuffer(in_data, dtype = numpy.uint8).reshape(lanes, LANE_LENGTH)
+    registers = numpy.zeros(lanes, dtype = numpy.uint64)
+    registers[0] = register
+    registers = update_rows(crc, registers, columns)
+    if crc.ReflectIn:
+        registers = reflect_array(registers, crc.Width)
+
+    length = LANE_LENGTH
+    while len(registers) > 1:
+        tables = table_cache.get((crc.Width, crc.Poly & crc.Mask, "mul-tables", length),
+                lambda: gen_mul_tables(crc, crc.shift_operator(length)))
+        registers = mul_array(tables, registers[0::2]) ^ registers[1::2]
+        length *= 2
+
+    register = int(registers[0])
+    if crc.ReflectIn:
+        register = crc.reflect(register, crc.Width)
+    return register
+
+
+# function lanes_crc
+###############################################################################
+def lanes_crc(crc, in_data, lanes = 4096, start = 0, end = None, encoding = "latin-1"):
+    """
+    Return the CRC of a single large buffer, calculated with the
+    lane-parallel algorithm (see lanes_update).
+    """
+    return crc.finalize_register(lanes_update(crc, crc.init_register(), in_data, lanes, start, end, encoding))
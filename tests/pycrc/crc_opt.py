@@ -33,6 +33,7 @@ use as follows:
 
 from optparse import OptionParser, Option, OptionValueError
 from copy import copy
+import os
 import sys
 from crc_models import CrcModels
 
@@ -56,6 +57,12 @@ class Options(object):
     Algo_Bit_by_Bit_Fast    = 0x02
     Algo_Bitwise_Expression = 0x04
     Algo_Table_Driven       = 0x08
+    Algo_Slice_By_4         = 0x10
+    Algo_Slice_By_8         = 0x20
+    Algo_Slice_By_16        = 0x40
+    Algo_Slice_By           = Algo_Slice_By_4 | Algo_Slice_By_8 | Algo_Slice_By_16
+    Algo_Lanes              = 0x80
+    Algo_Long_Division      = 0x100
 
     Action_Check_String     = 0x01
     Action_Check_Hex_String = 0x02
@@ -64,6 +71,7 @@ class Options(object):
     Action_Generate_C       = 0x05
     Action_Generate_C_Main  = 0x06
     Action_Generate_Table   = 0x07
+    Action_Prewarm_Cache    = 0x08
 
 
     # Class constructor
@@ -89,6 +97,9 @@ class Options(object):
         self.OutputFile     = None
         self.Action         = self.Action_Check_String
         self.CheckFile      = None
+        self.Jobs           = 1
+        self.CacheDir       = None
+        self.Models         = []
         self.CStd           = None
         self.UndefinedCrcParameters = False
 
@@ -109,9 +120,15 @@ To calculate the checksum of a string or hexadecimal data:
 To calculate the checksum of a file:
     python %prog [model] --check-file filename
 
+To calculate the checksums of several models in a single pass:
+    python %prog --model crc-32,crc-32c,crc-64-xz --check-file filename
+
 To generate the C source code and write it to filename:
     python %prog [model] --generate c -o filename
 
+To generate the lookup tables of all models in the on-disk cache:
+    python %prog --cache-dir dirname --prewarm-cache
+
 The model can be defined either with the --model switch or by specifying each
 of the following parameters:
     --width --poly --reflect-in --xor-in --reflect-out --xor-out"""
@@ -131,6 +148,15 @@ of the following parameters:
         parser.add_option("--check-file",
                         action="store", type="string", dest="check_file",
                         help="calculate the checksum of a file", metavar="FILE")
+        parser.add_option("--jobs",
+                        action="store", type="int", dest="jobs", default=1,
+                        help="calculate the checksum of a file with NUM worker processes", metavar="NUM")
+        parser.add_option("--cache-dir",
+                        action="store", type="string", dest="cache_dir", default=None,
+                        help="keep the lookup tables in DIR; defaults to the PYCRC_CACHE_DIR environment variable", metavar="DIR")
+        parser.add_option("--prewarm-cache",
+                        action="store_true", dest="prewarm_cache", default=False,
+                        help="generate the lookup tables of all models in the cache directory")
         parser.add_option("--generate",
                         action="store", type="string", dest="generate", default=None,
                         help="generate C source code; choose the type from {h, c, c-main, table}", metavar="CODE")
@@ -139,10 +165,10 @@ of the following parameters:
                         help="choose the C dialect of the generated code from {C89, ANSI, C99}", metavar="STD")
         parser.add_option("--algorithm",
                         action="store", type="string", dest="algorithm", default="all",
-                        help="choose an algorithm from {bit-by-bit, bbb, bit-by-bit-fast, bbf, bitwise-expression, bwe, table-driven, tbl, all}", metavar="ALGO")
+                        help="choose an algorithm from {bit-by-bit, bbb, bit-by-bit-fast, bbf, bitwise-expression, bwe, table-driven, tbl, slice-by-4, sb4, slice-by-8, sb8, slice-by-16, sb16, lane-parallel, lanes, long-division, ld, all}", metavar="ALGO")
         parser.add_option("--model",
                         action="callback", callback=self.model_cb, type="string", dest="model", default=None,
-                        help="choose a parameter set from {%s}" % model_list, metavar="MODEL")
+                        help="choose a parameter set from {%s}; a comma-separated list of models calculates the checksum of each of them in a single pass" % model_list, metavar="MODEL")
         parser.add_option("--width",
                         action="store", type="hex", dest="width",
                         help="use NUM bits in the polynomial", metavar="NUM")
@@ -163,7 +189,7 @@ of the following parameters:
                         help="xor the final CRC value with HEX", metavar="HEX")
         parser.add_option("--table-idx-width",
                         action="store", type="int", dest="table_idx_width",
-                        help="use NUM bits to index the CRC table; NUM must be one of the values {1, 2, 4, 8}", metavar="NUM")
+                        help="use NUM bits to index the CRC table; NUM must be one of the values {1, 2, 4, 8} when generating source code, or between 1 and 16 otherwise", metavar="NUM")
         parser.add_option("--symbol-prefix",
                         action="store", type="string", dest="symbol_prefix",
                         help="when generating source code, use STRING as prefix to the exported C symbols", metavar="STRING")
@@ -205,10 +231,7 @@ of the following parameters:
         else:
             undefined_params.append("--xor-out")
         if options.table_idx_width != None:
-            if options.table_idx_width == 1 or \
-                    options.table_idx_width == 2 or \
-                    options.table_idx_width == 4 or \
-                    options.table_idx_width == 8:
+            if 1 <= options.table_idx_width <= 16:
                 self.TableIdxWidth = options.table_idx_width
                 self.TableWidth = 1 << options.table_idx_width
             else:
@@ -251,6 +274,16 @@ of the following parameters:
                 self.Algorithm      |= self.Algo_Bitwise_Expression
             if alg in set(["table-driven", "tbl", "all"]):
                 self.Algorithm      |= self.Algo_Table_Driven
+            if alg in set(["slice-by-4", "sb4", "all"]):
+                self.Algorithm      |= self.Algo_Slice_By_4
+            if alg in set(["slice-by-8", "sb8", "all"]):
+                self.Algorithm      |= self.Algo_Slice_By_8
+            if alg in set(["slice-by-16", "sb16", "all"]):
+                self.Algorithm      |= self.Algo_Slice_By_16
+            if alg in set(["lane-parallel", "lanes", "all"]):
+                self.Algorithm      |= self.Algo_Lanes
+            if alg in set(["long-division", "ld", "all"]):
+                self.Algorithm      |= self.Algo_Long_Division
             if self.Algorithm == 0:
                 sys.stderr.write("%s: error: unknown algorithm %s\n" % (sys.argv[0], options.algorithm))
                 sys.exit(1)
@@ -294,6 +327,20 @@ of the following parameters:
             self.CheckFile      = options.check_file
             self.Algorithm &= ~(self.Algo_Bitwise_Expression)
             op_count += 1
+        if options.jobs < 1:
+            sys.stderr.write("%s: error: the number of jobs must be strictly positive\n" % sys.argv[0])
+            sys.exit(1)
+        self.Jobs = options.jobs
+        if options.cache_dir != None:
+            self.CacheDir = options.cache_dir
+        elif os.environ.get("PYCRC_CACHE_DIR"):
+            self.CacheDir = os.environ.get("PYCRC_CACHE_DIR")
+        if options.prewarm_cache:
+            if self.CacheDir == None:
+                sys.stderr.write("%s: error: --prewarm-cache requires --cache-dir\n" % sys.argv[0])
+                sys.exit(1)
+            self.Action = self.Action_Prewarm_Cache
+            op_count += 1
         if options.generate != None:
             arg = options.generate.lower()
             if arg == 'h':
@@ -314,20 +361,28 @@ of the following parameters:
                     sys.stderr.write("%s: error: the --generate table option is incompatible with the --algorithm option\n" % sys.argv[0])
                     sys.exit(1)
                 self.Algorithm = self.Algo_Table_Driven
+            elif self.Algorithm in set([self.Algo_Slice_By_4, self.Algo_Slice_By_8, self.Algo_Slice_By_16, self.Algo_Lanes, self.Algo_Long_Division]):
+                sys.stderr.write("%s: error: algorithm %s is only applicable to calculate checksums\n" % (sys.argv[0], options.algorithm))
+                sys.exit(1)
             elif self.Algorithm not in set([self.Algo_Bit_by_Bit, self.Algo_Bit_by_Bit_Fast, self.Algo_Bitwise_Expression, self.Algo_Table_Driven]):
                 sys.stderr.write("%s: error: select an algorithm to be used in the generated file\n" % sys.argv[0])
                 sys.exit(1)
-        else:
-            if self.TableIdxWidth != 8:
-                sys.stderr.write("%s: warning: reverting to Table Index Width = 8 for internal CRC calculation\n" % sys.argv[0])
-                self.TableIdxWidth = 8
-                self.TableWidth = 1 << options.table_idx_width
+            if self.Width != None and self.Width > 64:
+                sys.stderr.write("%s: error: unsupported width %d for code generation\n" % (sys.argv[0], self.Width))
+                sys.exit(1)
+            if self.TableIdxWidth not in set([1, 2, 4, 8]):
+                sys.stderr.write("%s: error: unsupported table-idx-width %d for code generation\n" % (sys.argv[0], self.TableIdxWidth))
+                sys.exit(1)
         if op_count == 0:
             self.Action = self.Action_Check_String
         if op_count > 1:
             sys.stderr.write("%s: error: too many actions scecified\n" % sys.argv[0])
             sys.exit(1)
 
+        if len(self.Models) > 1 and self.Action not in set((self.Action_Check_String, self.Action_Check_Hex_String, self.Action_Check_File)):
+            sys.stderr.write("%s: error: several models can only be used to calculate checksums\n" % sys.argv[0])
+            sys.exit(1)
+
         if (self.Algorithm == self.Algo_Bitwise_Expression) and \
             (self.Action == self.Action_Check_String or self.Action == self.Action_Check_Hex_String or self.Action == self.Action_Check_File):
             sys.stderr.write("Error: algorithm %s is only applicable to generate source code\n" % options.algorithm)
@@ -350,20 +405,24 @@ of the following parameters:
         This function sets up the single parameters if the 'model' option has been selected
         by the user.
         """
-        model_name = value.lower()
         models = CrcModels()
-        model = models.getParams(model_name)
-        if model != None:
-            setattr(parser.values, 'width',         model['width'])
-            setattr(parser.values, 'poly',          model['poly'])
-            setattr(parser.values, 'reflect_in',    model['reflect_in'])
-            setattr(parser.values, 'xor_in',        model['xor_in'])
-            setattr(parser.values, 'reflect_out',   model['reflect_out'])
-            setattr(parser.values, 'xor_out',       model['xor_out'])
-        else:
-            models = CrcModels()
-            model_list = ", ".join(models.getList())
-            raise OptionValueError("unsupported model %s.  Supported models are: %s." % (value, model_list))
+        params = []
+        for model_name in value.lower().split(","):
+            model = models.getParams(model_name.strip())
+            if model == None:
+                model_list = ", ".join(models.getList())
+                raise OptionValueError("unsupported model %s.  Supported models are: %s." % (model_name, model_list))
+            params.append(model)
+        # The single parameters are set from the first model.  Several models
+        # can only be used to calculate checksums (see pycrc.check_models).
+        self.Models = params
+        model = params[0]
+        setattr(parser.values, 'width',         model['width'])
+        setattr(parser.values, 'poly',          model['poly'])
+        setattr(parser.values, 'reflect_in',    model['reflect_in'])
+        setattr(parser.values, 'xor_in',        model['xor_in'])
+        setattr(parser.values, 'reflect_out',   model['reflect_out'])
+        setattr(parser.values, 'xor_out',       model['xor_out'])
 
 
 # function check_hex
@@ -0,0 +1,359 @@
+#  pycrc -- parameterisable CRC calculation utility and C source code generator
+#
+#  Copyright (c) 2006-2013  Thomas Pircher  <tehpeh@gmx.net>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to
+#  deal in the Software without restriction, including without limitation the
+#  rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+#  sell copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+#  FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+#  IN THE SOFTWARE.
+
+
+
+
+"""
+Parallel CRC calculation.
+
+The input is split into ranges, the CRC of each range is calculated in a
+separate worker and the partial results are merged with Crc.combine.  The
+result is identical to the CRC calculated in a single pass.
+
+Files are processed by worker processes.  Buffers in memory are processed by
+a pool of threads, which run in parallel on a free-threaded Python build
+(and on Python builds where the GIL is disabled).
+
+The lookup tables are built once by the parent process and mapped into the
+worker processes from a shared file (see SharedTables), so the workers
+neither rebuild nor copy them.  Only the folding steps of the long division
+algorithm, which are not stored as arrays and take a few milliseconds to
+build, are generated by each worker.
+
+Example:
+
+   from crc_algorithms import Crc
+   from crc_parallel import crc_file
+
+   crc = Crc(width = 32, poly = 0x4c11db7,
+             reflect_in = True, xor_in = 0xffffffff,
+             reflect_out = True, xor_out = 0xffffffff)
+   print("0x%x" % crc_file(crc, "image.bin", jobs = 4))
+   print("0x%x" % crc_buffer(crc, data, jobs = 4))
+
+To share the tables of several models with a pool of your own:
+
+   from crc_parallel import SharedTables, attach_tables
+
+   with SharedTables() as tables:
+       tables.add_crc(crc)
+       pool = multiprocessing.Pool(4, attach_tables, (tables.spec(),))
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from crc_algorithms import CrcHash, table_cache
+import array
+import errno
+import mmap
+import multiprocessing
+import os
+import tempfile
+
+
+# The number of octets read from a file at a time.
+CHUNK_SIZE = 1024 * 1024
+
+# The minimal size of a range; smaller inputs are not worth the overhead of a
+# worker process.
+MIN_RANGE_SIZE = 4 * CHUNK_SIZE
+
+# The minimal size of a range processed by a worker thread.
+MIN_THREAD_RANGE_SIZE = 256 * 1024
+
+# The table files mapped by attach_tables.  They are kept open for the
+# lifetime of the worker process, as the table cache refers to them.
+attached_tables = []
+
+
+# Class SharedTables
+###############################################################################
+class SharedTables(object):
+    """
+    A registry of lookup tables in shared memory.
+
+    The parent process adds the tables of each model once; they are written
+    to a temporary file, in /dev/shm where it exists.  spec() returns a
+    picklable description of the tables, which worker processes pass to
+    attach_tables to map the file read-only into their table cache.  All
+    processes share the same pages of the file, so the tables are neither
+    rebuilt nor copied.  The file is removed by close(), after the workers
+    have finished.
+    """
+
+    # Class constructor
+    ###############################################################################
+    def __init__(self):
+        """The SharedTables constructor."""
+        if os.path.isdir("/dev/shm"):
+            tmpdir = "/dev/shm"
+        else:
+            tmpdir = None
+        fd, self.FileName = tempfile.mkstemp(prefix = "pycrc-tables.", dir = tmpdir)
+        self.__file     = os.fdopen(fd, "wb")
+        self.__tables   = []
+
+
+    # function add
+    ###############################################################################
+    def add(self, key, tbl):
+        """
+        Write a table of the table cache, which is either an array or a tuple
+        of arrays of the same type and length, to the shared file.  Tables
+        which are not stored as arrays (see crc_algorithms.compact_table) are
+        not shared; the workers generate them themselves.
+        """
+        if key in [t[0] for t in self.__tables]:
+            return
+        tables = tbl if isinstance(tbl, tuple) else (tbl, )
+        if not all(isinstance(t, array.array) for t in tables):
+            return
+        # Align the tables to 8 octets.
+        offset = -(-self.__file.tell() // 8) * 8
+        self.__file.write(b"\0" * (offset - self.__file.tell()))
+        for t in tables:
+            self.__file.write(t.tobytes())
+        count = len(tables) if isinstance(tbl, tuple) else None
+        self.__tables.append((key, offset, tables[0].typecode, len(tables[0]), count))
+
+
+    # function add_crc
+    ###############################################################################
+    def add_crc(self, crc, slices = (8, )):
+        """
+        Add the table of the table-driven algorithm and the tables of the
+        slice_by algorithm with the given numbers of slices for a Crc object.
+        """
+        self.add((crc.Width, crc.Poly & crc.Mask, crc.ReflectIn, crc.TableIdxWidth), crc.get_table())
+        for n in slices:
+            self.add((crc.Width, crc.Poly & crc.Mask, "slice-by", n), crc.get_slice_tables(n))
+
+
+    # function spec
+    ###############################################################################
+    def spec(self):
+        """
+        Return the picklable description of the tables for attach_tables.
+        """
+        self.__file.flush()
+        return (self.FileName, list(self.__tables))
+
+
+    # function close
+    ###############################################################################
+    def close(self):
+        """
+        Remove the shared file.
+        """
+        if not self.__file.closed:
+            self.__file.close()
+            os.remove(self.FileName)
+
+
+    # function __enter__
+    ###############################################################################
+    def __enter__(self):
+        return self
+
+
+    # function __exit__
+    ###############################################################################
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# function attach_tables
+###############################################################################
+def attach_tables(spec):
+    """
+    Map the tables described by spec (see SharedTables.spec) read-only into
+    the table cache of this process.  This function is meant to be used as the
+    initializer of a multiprocessing pool.
+    """
+    filename, tables = spec
+    if not tables:
+        return
+    with open(filename, "rb") as in_file:
+        data = mmap.mmap(in_file.fileno(), 0, access = mmap.ACCESS_READ)
+    attached_tables.append(data)
+    view = memoryview(data)
+    for key, offset, typecode, length, count in tables:
+        size = length * array.array(typecode).itemsize
+        if count == None:
+            tbl = view[offset:offset + size].cast(typecode)
+        else:
+            tbl = tuple(view[offset + i * size:offset + (i + 1) * size].cast(typecode) for i in range(count))
+        table_cache.put(key, tbl)
+
+
+# function data_extents
+###############################################################################
+def data_extents(in_file, offset, length):
+    """
+    Yield the (offset, length) tuples of the data extents of a file in the
+    range of length octets starting at offset, as reported by lseek with
+    SEEK_DATA and SEEK_HOLE.  The octets between the extents are holes, which
+    read as zeros.  If the platform or the file system does not support
+    SEEK_DATA, the whole range is returned as a single extent.
+    """
+    end = offset + length
+    if not hasattr(os, "SEEK_DATA"):
+        if length > 0:
+            yield offset, length
+        return
+    fd = in_file.fileno()
+    while offset < end:
+        try:
+            data = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno != errno.ENXIO:
+                # SEEK_DATA is not supported by the file system.
+                yield offset, end - offset
+            # ENXIO: there is no data after offset.
+            return
+        if data >= end:
+            return
+        hole = min(os.lseek(fd, data, os.SEEK_HOLE), end)
+        yield data, hole - data
+        offset = hole
+
+
+# function crc_file_range
+###############################################################################
+def crc_file_range(crc, filename, offset, length, slices = None):
+    """
+    Return the CRC of length octets of a file, starting at offset.
+
+    Only the data extents of the file are read (see data_extents); the holes
+    of a sparse file are fed into the register as runs of zeros, in
+    O(log(n)) steps (see Crc.zeros_update).  Octets beyond the end of the
+    file are ignored.
+    """
+    h = CrcHash(crc, slices = slices)
+    in_file = open(filename, 'rb')
+    try:
+        end = min(offset + length, os.fstat(in_file.fileno()).st_size)
+        position = offset
+        for (data, size) in data_extents(in_file, offset, end - offset):
+            h.update_zeros(data - position)
+            in_file.seek(data)
+            position = data
+            while size > 0:
+                check_byte_str = in_file.read(min(CHUNK_SIZE, size))
+                if not check_byte_str:
+                    # The file has been truncated.
+                    return h.crcValue
+                h.update(check_byte_str)
+                position += len(check_byte_str)
+                size -= len(check_byte_str)
+        h.update_zeros(end - position)
+    finally:
+        in_file.close()
+    return h.crcValue
+
+
+# function split_ranges
+###############################################################################
+def split_ranges(size, jobs, min_size = MIN_RANGE_SIZE):
+    """
+    Split size octets into at most jobs ranges of at least min_size octets
+    and return a list of (offset, length) tuples.
+    """
+    count = max(1, min(jobs, size // min_size))
+    length = -(-size // count)
+    return [(offset, min(length, size - offset)) for offset in range(0, max(size, 1), length or 1)]
+
+
+# function crc_file
+###############################################################################
+def crc_file(crc, filename, jobs = None, slices = None):
+    """
+    Return the CRC of a file, calculated by up to jobs worker processes.
+    If jobs is None, one worker per CPU is used.
+    """
+    if jobs == None:
+        jobs = multiprocessing.cpu_count()
+    ranges = split_ranges(os.path.getsize(filename), jobs)
+    if len(ranges) == 1:
+        return crc_file_range(crc, filename, 0, ranges[0][1], slices)
+
+    with SharedTables() as tables:
+        if slices != None:
+            tables.add((crc.Width, crc.Poly & crc.Mask, "slice-by", slices), crc.get_slice_tables(slices))
+        elif crc.Native == None:
+            tables.add_crc(crc, ())
+        pool = multiprocessing.Pool(min(jobs, len(ranges)), attach_tables, (tables.spec(), ))
+        try:
+            crcs = pool.starmap(crc_file_range, [(crc, filename, offset, length, slices) for (offset, length) in ranges])
+        finally:
+            pool.close()
+            pool.join()
+
+    return combine_ranges(crc, crcs, ranges)
+
+
+# function crc_buffer_range
+###############################################################################
+def crc_buffer_range(crc, in_data, slices = None):
+    """
+    Return the CRC of a buffer.
+    """
+    h = CrcHash(crc, slices = slices)
+    h.update(in_data)
+    return h.crcValue
+
+
+# function crc_buffer
+###############################################################################
+def crc_buffer(crc, in_data, jobs = None, slices = None):
+    """
+    Return the CRC of a bytes-like object, calculated by up to jobs worker
+    threads.  If jobs is None, one thread per CPU is used.
+
+    The Crc object is shared by all threads; the ranges of the buffer are
+    passed to the threads as memoryview slices, without copying the data.
+    """
+    if jobs == None:
+        jobs = multiprocessing.cpu_count()
+    in_data = memoryview(in_data).cast('B')
+    ranges = split_ranges(len(in_data), jobs, MIN_THREAD_RANGE_SIZE)
+    if len(ranges) == 1:
+        return crc_buffer_range(crc, in_data, slices)
+
+    executor = ThreadPoolExecutor(max_workers = min(jobs, len(ranges)))
+    try:
+        crcs = list(executor.map(lambda r: crc_buffer_range(crc, in_data[r[0]:r[0] + r[1]], slices), ranges))
+    finally:
+        executor.shutdown()
+    return combine_ranges(crc, crcs, ranges)
+
+
+# function combine_ranges
+###############################################################################
+def combine_ranges(crc, crcs, ranges):
+    """
+    Merge the CRCs of consecutive ranges into the CRC of the whole input.
+    """
+    result = crcs[0]
+    for i in range(1, len(ranges)):
+        result = crc.combine(result, crcs[i], ranges[i][1])
+    return result
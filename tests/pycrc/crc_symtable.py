@@ -137,6 +137,7 @@ class SymbolTable:
         self.table["crc_table_gen_function"] = self.opt.SymbolPrefix + "table_gen"
         self.table["crc_init_function"] = self.opt.SymbolPrefix + "init"
         self.table["crc_update_function"] = self.opt.SymbolPrefix + "update"
+        self.table["crc_update_bits_function"] = self.opt.SymbolPrefix + "update_bits"
         self.table["crc_finalize_function"] = self.opt.SymbolPrefix + "finalize"
 
     # function getTerminal
@@ -184,6 +185,13 @@ class SymbolTable:
                     return  self.__pretty_bool(True)
             return  self.__pretty_bool(False)
 
+        elif id == "simple_crc_update_bits_def":
+            # The tail bits are fed in bit by bit, which needs the polynomial
+            # also for the table-driven and bitwise-expression algorithms.
+            if self.opt.Width != None and self.opt.Poly != None and self.opt.ReflectIn != None:
+                return  self.__pretty_bool(True)
+            return  self.__pretty_bool(False)
+
         elif id == "inline_crc_finalize":
             if self.opt.Algorithm in set([self.opt.Algo_Bit_by_Bit_Fast, self.opt.Algo_Bitwise_Expression, self.opt.Algo_Table_Driven]) and \
                     (self.opt.Width != None and self.opt.ReflectIn != None and self.opt.ReflectOut != None and self.opt.XorOut != None):
@@ -226,6 +234,16 @@ class SymbolTable:
                 return "bitwise-expression"
             elif self.opt.Algorithm == self.opt.Algo_Table_Driven:
                 return  "table-driven"
+            elif self.opt.Algorithm == self.opt.Algo_Slice_By_4:
+                return  "slice-by-4"
+            elif self.opt.Algorithm == self.opt.Algo_Slice_By_8:
+                return  "slice-by-8"
+            elif self.opt.Algorithm == self.opt.Algo_Slice_By_16:
+                return  "slice-by-16"
+            elif self.opt.Algorithm == self.opt.Algo_Lanes:
+                return  "lane-parallel"
+            elif self.opt.Algorithm == self.opt.Algo_Long_Division:
+                return  "long-division"
             else:
                 return  "UNDEFINED"
 
@@ -373,6 +391,10 @@ $crc_update_doc
 $crc_update_function_def;
 
 
+$crc_update_bits_doc
+$crc_update_bits_function_def;
+
+
 $crc_finalize_doc
 $if ($inline_crc_finalize == True) {:
 $if ($c_std == C89) {:
@@ -587,6 +609,93 @@ $crc_table_core_algorithm_nonreflected
 }
 
 
+"""
+
+        elif id == "crc_update_bits_function_gen":
+            return  """\
+$crc_update_bits_doc
+$crc_update_bits_function_def$nop
+{
+    unsigned int i;
+    unsigned int bits = data_bit_len % 8;
+    unsigned char c;
+    int bit;
+
+    crc = $crc_update_function($if ($simple_crc_update_def != True) {:cfg, :}crc, data, data_bit_len / 8);
+    if (bits == 0) {
+        return crc;
+    }
+    c = data[data_bit_len / 8];
+$if ($crc_algorithm == "bit-by-bit" or $crc_algorithm == "bit-by-bit-fast") {:
+$if ($crc_reflect_in == Undefined) {:
+    if ($cfg_reflect_in) {
+        c = $crc_reflect_function(c, 8);
+    }
+:} $elif ($crc_reflect_in == True) {:
+    c = $crc_reflect_function(c, 8);
+:}
+    for (i = 0; i < bits; i++) {
+        bit = !!(crc & $cfg_msb_mask);
+$if ($crc_algorithm == "bit-by-bit") {:
+        crc = (crc << 1) | ((c >> (7 - i)) & 0x01);
+:} $else {:
+        if ((c >> (7 - i)) & 0x01) {
+            bit = !bit;
+        }
+        crc <<= 1;
+:}
+        if (bit) {
+            crc ^= $cfg_poly;
+        }
+    }
+    return crc & $cfg_mask;
+:} $elif ($crc_algorithm == "bitwise-expression" or $crc_algorithm == "table-driven") {:
+$if ($crc_reflect_in == Undefined) {:
+    if ($cfg_reflect_in) {
+        for (i = 0; i < bits; i++) {
+            bit = ($if ($crc_shift != 0) {:(crc >> $cfg_shift):} $else {:crc:} ^ (c >> i)) & 0x01;
+            crc = (crc >> 1) & $cfg_mask_shifted;
+            if (bit) {
+                crc ^= $crc_reflect_function($cfg_poly, $cfg_width)$if ($crc_shift != 0) {: << $cfg_shift:};
+            }
+        }
+    } else {
+        for (i = 0; i < bits; i++) {
+            bit = !!(crc & $cfg_msb_mask_shifted);
+            if ((c >> (7 - i)) & 0x01) {
+                bit = !bit;
+            }
+            crc = (crc << 1) & $cfg_mask_shifted;
+            if (bit) {
+                crc ^= $cfg_poly_shifted;
+            }
+        }
+    }
+:} $elif ($crc_reflect_in == True) {:
+    for (i = 0; i < bits; i++) {
+        bit = ($if ($crc_shift != 0) {:(crc >> $cfg_shift):} $else {:crc:} ^ (c >> i)) & 0x01;
+        crc = (crc >> 1) & $cfg_mask_shifted;
+        if (bit) {
+            crc ^= $crc_reflect_function($cfg_poly, $cfg_width)$if ($crc_shift != 0) {: << $cfg_shift:};
+        }
+    }
+:} $else {:
+    for (i = 0; i < bits; i++) {
+        bit = !!(crc & $cfg_msb_mask_shifted);
+        if ((c >> (7 - i)) & 0x01) {
+            bit = !bit;
+        }
+        crc = (crc << 1) & $cfg_mask_shifted;
+        if (bit) {
+            crc ^= $cfg_poly_shifted;
+        }
+    }
+:}
+    return crc & $cfg_mask_shifted;
+:}
+}
+
+
 """
 
         elif id == "crc_finalize_function_gen":
@@ -787,6 +896,34 @@ $crc_t $crc_update_function(const $cfg_t *cfg, $crc_t crc, const unsigned char *
 :} $else {:
 $crc_t $crc_update_function($crc_t crc, const unsigned char *data, size_t data_len)\
 :}\
+"""
+
+        elif id == "crc_update_bits_doc":
+            return  """\
+/**
+ * Update the crc value with the first \\a data_bit_len bits of \\a data.
+ *
+ * The whole bytes are processed by $crc_update_function, the remaining 1 to 7
+ * bits of the last byte one bit at a time, starting with the most significant
+ * bit, or with the least significant bit if the input is reflected.
+ *
+ * \\param crc          The current crc value.
+$if ($simple_crc_update_bits_def != True) {:
+ * \\param cfg          A pointer to a initialised $cfg_t structure.
+:}
+ * \\param data         Pointer to a buffer of (\\a data_bit_len + 7) / 8 bytes.
+ * \\param data_bit_len Number of bits in the \\a data buffer.
+ * \\return             The updated crc value.
+ *****************************************************************************/\
+"""
+
+        elif id == "crc_update_bits_function_def":
+            return  """\
+$if ($simple_crc_update_bits_def != True) {:
+$crc_t $crc_update_bits_function(const $cfg_t *cfg, $crc_t crc, const unsigned char *data, size_t data_bit_len)\
+:} $else {:
+$crc_t $crc_update_bits_function($crc_t crc, const unsigned char *data, size_t data_bit_len)\
+:}\
 """
 
         elif id == "crc_finalize_doc":
@@ -834,6 +971,7 @@ $c_table_gen\
 $crc_reflect_function_gen\
 $crc_init_function_gen\
 $crc_update_function_gen\
+$crc_update_bits_function_gen\
 $crc_finalize_function_gen\
 """
 
@@ -874,6 +1012,7 @@ $if ($c_std != C89) {:
 #include <string.h>
 
 static char str[256] = "123456789";
+static long bit_len = -1;
 static $c_bool verbose = $c_false;
 
 void print_params($if ($undefined_parameters == True) {:const $cfg_t *cfg:} $else {:void:});
@@ -952,7 +1091,14 @@ $if ($crc_algorithm == "table-driven" and $constant_crc_table != True) {:
     $crc_table_gen_function(&cfg);
 :}
     crc = $crc_init_function($if ($constant_crc_init != True) {:&cfg:});
-    crc = $crc_update_function($if ($simple_crc_update_def != True) {:&cfg, :}crc, (unsigned char *)str, strlen(str));
+    if (bit_len >= 0) {
+        if ((size_t)bit_len > strlen(str) * 8) {
+            bit_len = (long)(strlen(str) * 8);
+        }
+        crc = $crc_update_bits_function($if ($simple_crc_update_bits_def != True) {:&cfg, :}crc, (unsigned char *)str, (size_t)bit_len);
+    } else {
+        crc = $crc_update_function($if ($simple_crc_update_def != True) {:&cfg, :}crc, (unsigned char *)str, strlen(str));
+    }
     crc = $crc_finalize_function($if ($simple_crc_finalize_def != True) {:&cfg, :}crc);
 
     if (verbose) {
@@ -1052,6 +1198,7 @@ $if ($crc_xor_out == Undefined) {:
 :}
         {"verbose",         0, 0, 'v'},
         {"check-string",    1, 0, 's'},
+        {"bit-length",      1, 0, 'l'},
 $if ($crc_width == Undefined) {:
         {"table-idx-with",  1, 0, 't'},
 :}
@@ -1061,7 +1208,7 @@ $if ($crc_width == Undefined) {:
     while (1) {
         option_index = 0;
 
-        c = getopt_long(argc, argv, "w:p:n:i:u:o:s:vt", long_options, &option_index);
+        c = getopt_long(argc, argv, "w:p:n:i:u:o:s:l:vt", long_options, &option_index);
         if (c == -1)
             break;
 
@@ -1105,6 +1252,9 @@ $if ($crc_xor_out == Undefined) {:
                 memcpy(str, optarg, strlen(optarg) < sizeof(str) ? strlen(optarg) + 1 : sizeof(str));
                 str[sizeof(str) - 1] = '\\0';
                 break;
+            case 'l':
+                bit_len = atol(optarg);
+                break;
             case 'v':
                 verbose = $c_true;
                 break;
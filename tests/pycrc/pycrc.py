@@ -37,16 +37,30 @@ It supports the following CRC algorithms:
                         augmented message
     -  bit-by-bit-fast  a variation of the simple bit-by-bit algorithm
     -  table-driven     the standard table driven algorithm
+    -  slice-by-N       a table driven algorithm which processes N = 4, 8 or
+                        16 octets at a time (checksums only)
+    -  lane-parallel    splits the message into blocks which are processed
+                        side by side with NumPy (checksums only)
+    -  long-division    divides blocks of the message, converted to big
+                        integers, by the polynomial (checksums only)
 """
 
 from __future__ import print_function
 from crc_opt import Options
-from crc_algorithms import Crc
+from crc_algorithms import Crc, CrcHash, CrcMultiHash, REFLECTED_OCTETS, prewarm_table_cache, table_cache
 from crc_parser import MacroParser, ParseError
 import binascii
+import os
 import sys
 
 
+# The number of octets read from a file at a time.
+FILE_CHUNK_SIZE = 1024 * 1024
+
+# The number of octets read from a file at a time by the lane-parallel algorithm.
+LANES_CHUNK_SIZE = 16 * 1024 * 1024
+
+
 # function print_parameters
 ###############################################################################
 def print_parameters(opt):
@@ -67,6 +81,17 @@ def print_parameters(opt):
     return mp.out_str
 
 
+# function slice_by_algorithms
+###############################################################################
+def slice_by_algorithms(opt):
+    """
+    Return the selected slice-by-N algorithms as a list of (algorithm, N) tuples.
+    """
+    return [(algo, slices) for (algo, slices) in [
+                (opt.Algo_Slice_By_4, 4), (opt.Algo_Slice_By_8, 8), (opt.Algo_Slice_By_16, 16)]
+            if opt.Algorithm & algo]
+
+
 # function check_string
 ###############################################################################
 def check_string(opt):
@@ -84,6 +109,12 @@ def check_string(opt):
         reflect_in = opt.ReflectIn, xor_in = opt.XorIn,
         reflect_out = opt.ReflectOut, xor_out = opt.XorOut,
         table_idx_width = opt.TableIdxWidth)
+    if isinstance(opt.CheckString, str):
+        try:
+            opt.CheckString.encode("latin-1")
+        except UnicodeEncodeError:
+            sys.stderr.write("%s: error: the string contains characters outside of the range 0-255; use --check-hexstring instead\n" % sys.argv[0])
+            sys.exit(1)
 
     crc = None
     if opt.Algorithm & opt.Algo_Bit_by_Bit:
@@ -97,12 +128,28 @@ def check_string(opt):
             error = True
         crc = bbf_crc
     if opt.Algorithm & opt.Algo_Table_Driven:
-        # no point making the python implementation slower by using less than 8 bits as index.
-        opt.TableIdxWidth = 8
         tbl_crc = alg.table_driven(opt.CheckString)
         if crc != None and tbl_crc != crc:
             error = True
         crc = tbl_crc
+    sb_crc = {}
+    for algo, slices in slice_by_algorithms(opt):
+        sb_crc[slices] = alg.slice_by(opt.CheckString, slices)
+        if crc != None and sb_crc[slices] != crc:
+            error = True
+        crc = sb_crc[slices]
+    if opt.Algorithm & opt.Algo_Lanes:
+        # crc_numpy imports NumPy, which is slow to load.
+        import crc_numpy
+        lanes_crc = crc_numpy.lanes_crc(alg, opt.CheckString)
+        if crc != None and lanes_crc != crc:
+            error = True
+        crc = lanes_crc
+    if opt.Algorithm & opt.Algo_Long_Division:
+        ld_crc = alg.long_division(opt.CheckString)
+        if crc != None and ld_crc != crc:
+            error = True
+        crc = ld_crc
 
     if error:
         sys.stderr.write("%s: error: different checksums!\n" % sys.argv[0])
@@ -112,6 +159,12 @@ def check_string(opt):
             sys.stderr.write("       bit-by-bit-fast:   0x%x\n" % bbf_crc)
         if opt.Algorithm & opt.Algo_Table_Driven:
             sys.stderr.write("       table_driven:      0x%x\n" % tbl_crc)
+        for algo, slices in slice_by_algorithms(opt):
+            sys.stderr.write("       %-19s0x%x\n" % ("slice_by_%d:" % slices, sb_crc[slices]))
+        if opt.Algorithm & opt.Algo_Lanes:
+            sys.stderr.write("       lane_parallel:     0x%x\n" % lanes_crc)
+        if opt.Algorithm & opt.Algo_Long_Division:
+            sys.stderr.write("       long_division:     0x%x\n" % ld_crc)
         sys.exit(1)
     return crc
 
@@ -145,12 +198,12 @@ def crc_file_update(alg, register, check_byte_str):
     """
     Update the CRC using the bit-by-bit-fast CRC algorithm.
     """
+    if alg.ReflectIn:
+        check_byte_str = check_byte_str.translate(REFLECTED_OCTETS)
     for octet in check_byte_str:
         if not isinstance(octet, int):
             # Python 2.x compatibility
             octet = ord(octet)
-        if alg.ReflectIn:
-            octet = alg.reflect(octet, 8)
         for j in range(8):
             bit = register & alg.MSB_Mask
             register <<= 1
@@ -167,7 +220,10 @@ def crc_file_update(alg, register, check_byte_str):
 def check_file(opt):
     """
     Calculate the CRC of a file.
-    This algorithm uses the table_driven CRC algorithm.
+    This function uses the bit-by-bit-fast algorithm if only bit-by-bit
+    algorithms are selected, the lane-parallel algorithm if only that is
+    selected, and an incremental slice-by-N calculation otherwise, split over
+    opt.Jobs worker processes.  The holes of sparse files are not read.
     """
     if opt.UndefinedCrcParameters:
         sys.stderr.write("%s: error: undefined parameters\n" % sys.argv[0])
@@ -183,6 +239,55 @@ def check_file(opt):
         sys.stderr.write("%s: error: can't open file %s\n" % (sys.argv[0], opt.CheckFile))
         sys.exit(1)
 
+    if opt.Algorithm & ~(opt.Algo_Bit_by_Bit | opt.Algo_Bit_by_Bit_Fast) != 0:
+        # Use the native CRC routine of the standard library where possible,
+        # unless the slice-by-N algorithm is requested explicitly.
+        if opt.Algorithm & opt.Algo_Slice_By and opt.Algorithm & ~opt.Algo_Slice_By == 0:
+            slices = slice_by_algorithms(opt)[-1][1]
+        else:
+            slices = None
+        # The bit-by-bit-fast code below starts from the reflected XorIn if
+        # ReflectIn is set.  The table-driven register is itself reflected in
+        # that case, so the same start value is XorIn as-is.
+        if opt.ReflectIn:
+            xor_in = alg.reflect(opt.XorIn, opt.Width)
+        else:
+            xor_in = opt.XorIn
+        tbl_alg = Crc(width = opt.Width, poly = opt.Poly,
+            reflect_in = opt.ReflectIn, xor_in = xor_in,
+            reflect_out = opt.ReflectOut, xor_out = opt.XorOut)
+        if opt.Algorithm == opt.Algo_Lanes:
+            import crc_numpy
+            register = tbl_alg.init_register()
+            check_byte_str = in_file.read(LANES_CHUNK_SIZE)
+            while check_byte_str:
+                register = crc_numpy.lanes_update(tbl_alg, register, check_byte_str)
+                check_byte_str = in_file.read(LANES_CHUNK_SIZE)
+            in_file.close()
+            return tbl_alg.finalize_register(register)
+        if opt.Algorithm == opt.Algo_Long_Division:
+            register = tbl_alg.init_register()
+            check_byte_str = in_file.read(FILE_CHUNK_SIZE)
+            while check_byte_str:
+                register = tbl_alg.long_division_update(register, check_byte_str)
+                check_byte_str = in_file.read(FILE_CHUNK_SIZE)
+            in_file.close()
+            return tbl_alg.finalize_register(register)
+        if opt.Jobs > 1 or os.path.isfile(opt.CheckFile):
+            # Regular files are read extent by extent, skipping the holes of
+            # sparse files (see crc_parallel.crc_file_range).  crc_parallel
+            # loads multiprocessing, so it is imported only here.
+            import crc_parallel
+            in_file.close()
+            return crc_parallel.crc_file(tbl_alg, opt.CheckFile, opt.Jobs, slices)
+        crc = CrcHash(tbl_alg, slices = slices)
+        check_byte_str = in_file.read(FILE_CHUNK_SIZE)
+        while check_byte_str:
+            crc.update(check_byte_str)
+            check_byte_str = in_file.read(FILE_CHUNK_SIZE)
+        in_file.close()
+        return crc.crcValue
+
     if not opt.ReflectIn:
         register = opt.XorIn
     else:
@@ -200,6 +305,51 @@ def check_file(opt):
     return register
 
 
+# function check_models
+###############################################################################
+def check_models(opt):
+    """
+    Return the list of the CRCs of a string, hex string or file for each of
+    the models in opt.Models.  The input is read once; models with the same
+    Width, Poly and ReflectIn share a register (see CrcMultiHash).
+    """
+    if opt.Algorithm & opt.Algo_Slice_By and opt.Algorithm & ~opt.Algo_Slice_By == 0:
+        slices = slice_by_algorithms(opt)[-1][1]
+    else:
+        slices = None
+    crcs = [Crc(width = m['width'], poly = m['poly'],
+                reflect_in = m['reflect_in'], xor_in = m['xor_in'],
+                reflect_out = m['reflect_out'], xor_out = m['xor_out']) for m in opt.Models]
+    h = CrcMultiHash(crcs, [m['name'] for m in opt.Models], slices)
+
+    if opt.Action == opt.Action_Check_File:
+        try:
+            in_file = open(opt.CheckFile, 'rb')
+        except IOError:
+            sys.stderr.write("%s: error: can't open file %s\n" % (sys.argv[0], opt.CheckFile))
+            sys.exit(1)
+        check_byte_str = in_file.read(FILE_CHUNK_SIZE)
+        while check_byte_str:
+            h.update(check_byte_str)
+            check_byte_str = in_file.read(FILE_CHUNK_SIZE)
+        in_file.close()
+    elif opt.Action == opt.Action_Check_Hex_String:
+        if len(opt.CheckString) % 2 != 0:
+            opt.CheckString = "0" + opt.CheckString
+        try:
+            h.update(binascii.unhexlify(opt.CheckString.encode("latin-1")))
+        except (TypeError, binascii.Error):
+            sys.stderr.write("%s: error: invalid hex string %s\n" % (sys.argv[0], opt.CheckString))
+            sys.exit(1)
+    else:
+        try:
+            h.update(opt.CheckString)
+        except UnicodeEncodeError:
+            sys.stderr.write("%s: error: the string contains characters outside of the range 0-255; use --check-hexstring instead\n" % sys.argv[0])
+            sys.exit(1)
+    return h.crcValues
+
+
 # main function
 ###############################################################################
 def main():
@@ -208,6 +358,22 @@ def main():
     """
     opt = Options()
     opt.parse(sys.argv[1:])
+    if opt.CacheDir != None:
+        table_cache.Directory = opt.CacheDir
+    if opt.Action == opt.Action_Prewarm_Cache:
+        try:
+            files = prewarm_table_cache(opt.TableIdxWidth)
+        except (IOError, OSError) as e:
+            sys.stderr.write("%s: error: %s\n" % (sys.argv[0], e))
+            sys.exit(1)
+        if opt.Verbose:
+            print("\n".join(files))
+        print("%d tables in %s" % (len(files), opt.CacheDir))
+        return 0
+    if len(opt.Models) > 1:
+        for crc in check_models(opt):
+            print("0x%x" % crc)
+        return 0
     if opt.Verbose:
         print(print_parameters(opt))
     if opt.Action == opt.Action_Check_String:
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+#  pycrc benchmark of the Python CRC implementation.
+#
+#  Compare the specialised update functions of the table-driven algorithm
+#  with the generic loop:
+#      python3 benchmark.py --benchmark table-driven --size 4
+#
+#  Compare the long division algorithm with the table-driven algorithm for
+#  messages of 1 KiB up to --size MiB:
+#      python3 benchmark.py --benchmark long-division --models crc-16,crc-32,crc-64-xz
+#
+#  Compare the throughput of models of different widths:
+#      python3 benchmark.py --benchmark widths --models crc-32,crc-64-xz,crc-82-darc
+#
+#  Run with a free-threaded Python build to compare the thread pool with and
+#  without the GIL:
+#      python3.13t -X gil=1 benchmark.py
+#      python3.13t -X gil=0 benchmark.py
+
+from optparse import OptionParser
+import os, sys
+import time
+sys.path.append("..")
+from crc_models import CrcModels
+from crc_algorithms import Crc
+import crc_parallel
+
+
+def gil_status():
+    """
+    Return a description of the state of the GIL.
+    """
+    if not hasattr(sys, "_is_gil_enabled"):
+        return "GIL enabled (no free-threaded build)"
+    if sys._is_gil_enabled():
+        return "GIL enabled"
+    return "GIL disabled"
+
+
+def get_crc(model_name, table_idx_width = None):
+    """
+    Return a Crc object for a model.
+    """
+    m = CrcModels().getParams(model_name)
+    if m is None:
+        sys.stderr.write("unknown model: %s\n" % model_name)
+        sys.exit(1)
+    return Crc(width = m["width"], poly = m["poly"],
+        reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+        reflect_out = m["reflect_out"], xor_out = m["xor_out"],
+        table_idx_width = table_idx_width)
+
+
+def run(func, repeat):
+    """
+    Run func repeat times and return its result and the best time.
+    """
+    best = None
+    for i in range(repeat):
+        t = time.perf_counter()
+        crc = func()
+        t = time.perf_counter() - t
+        if best is None or t < best:
+            best = t
+    return crc, best
+
+
+def show_time(dsc, crc, size, t, t_ref = None):
+    """
+    Print the result of a measurement, relative to t_ref if given.
+    """
+    out_str = "%-24s 0x%-24x %8.3f s %9.2f MB/s" % (dsc, crc, t, size / t / 1e6)
+    if t_ref is not None:
+        out_str += " %6.2fx" % (t_ref / t)
+    print(out_str)
+
+
+def bench_threads(crc, data, jobs_list, repeat):
+    """
+    Benchmark crc_parallel.crc_buffer with a varying number of threads.
+    The slice-by-8 algorithm is used also for models with a native
+    implementation: zlib releases the GIL, which would hide the effect of
+    the GIL on the Python code.
+    """
+    print("crc_buffer, slice-by-8, %s, %d CPUs" % (gil_status(), os.cpu_count()))
+    t_ref = None
+    for jobs in jobs_list:
+        crc_value, t = run(lambda: crc_parallel.crc_buffer(crc, data, jobs, slices = 8), repeat)
+        if t_ref is None:
+            t_ref = t
+        show_time("jobs = %d" % jobs, crc_value, len(data), t, t_ref)
+
+
+def bench_widths(model_names, data, repeat):
+    """
+    Benchmark the table-driven and slice-by-8 algorithms for models of
+    different widths, relative to the first model.
+    """
+    print("table_driven and slice_by, by width")
+    t_ref = {}
+    for model_name in model_names:
+        crc = get_crc(model_name)
+        for algo, func in [("tbl", crc.table_driven), ("sb8", crc.slice_by)]:
+            func(b"")
+            crc_value, t = run(lambda: func(data), repeat)
+            t_ref.setdefault(algo, t)
+            show_time("%s, %s" % (algo, model_name), crc_value, len(data), t, t_ref[algo])
+
+
+def bench_long_division(model_names, data, repeat):
+    """
+    Benchmark the long division algorithm against the table-driven algorithm
+    for several message sizes.
+    """
+    print("long_division vs. table_driven, by message size")
+    sizes = [size for size in [1024, 64 * 1024, 1024 * 1024] if size < len(data)] + [len(data)]
+    for model_name in model_names:
+        crc = get_crc(model_name)
+        for size in sizes:
+            message = data[:size]
+            crc.table_driven(message[:1])
+            crc.long_division(message)
+            crc_value, t_ref = run(lambda: crc.table_driven(message), repeat)
+            show_time("tbl, %s, %d KiB" % (model_name, size // 1024), crc_value, size, t_ref)
+            crc_value, t = run(lambda: crc.long_division(message), repeat)
+            show_time("ld, %s, %d KiB" % (model_name, size // 1024), crc_value, size, t, t_ref)
+
+
+def bench_table_driven(model_name, data, idx_widths, repeat):
+    """
+    Benchmark the specialised update functions of the table-driven algorithm
+    against the generic loop, for a varying table index width.  For index
+    widths which do not divide 8, table_driven_update uses the generic loop
+    as well.
+    """
+    print("table_driven_update, specialised vs. generic")
+    for idx_width in idx_widths:
+        crc = get_crc(model_name, idx_width)
+        crc.get_table_driven_update()
+        register = crc.init_register()
+        crc_value, t_ref = run(lambda: crc.table_driven_generic_update(register, data), repeat)
+        show_time("generic, idx = %d" % idx_width, crc.finalize_register(crc_value), len(data), t_ref)
+        crc_value, t = run(lambda: crc.table_driven_update(register, data), repeat)
+        show_time("specialised, idx = %d" % idx_width, crc.finalize_register(crc_value), len(data), t, t_ref)
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = OptionParser(usage = "%prog [OPTIONS]")
+    parser.add_option("--model",
+                    action="store", type="string", dest="model", default="crc-32",
+                    help="use the parameters of MODEL", metavar="MODEL")
+    parser.add_option("--size",
+                    action="store", type="int", dest="size", default=16,
+                    help="calculate the CRC of NUM MiB of random data", metavar="NUM")
+    parser.add_option("--jobs",
+                    action="store", type="string", dest="jobs", default="1,2,4,8",
+                    help="comma separated list of thread counts", metavar="LIST")
+    parser.add_option("--benchmark",
+                    action="store", type="string", dest="benchmark", default="threads",
+                    help="comma separated list of benchmarks from {threads, table-driven, widths, long-division}", metavar="LIST")
+    parser.add_option("--table-idx-width",
+                    action="store", type="string", dest="table_idx_width", default="1,4,5,8,16",
+                    help="comma separated list of table index widths", metavar="LIST")
+    parser.add_option("--models",
+                    action="store", type="string", dest="models", default="crc-32,crc-64-xz,crc-82-darc",
+                    help="comma separated list of models for the widths and long-division benchmarks", metavar="LIST")
+    parser.add_option("--repeat",
+                    action="store", type="int", dest="repeat", default=3,
+                    help="repeat each measurement NUM times", metavar="NUM")
+    (options, args) = parser.parse_args()
+
+    benchmarks = options.benchmark.split(",")
+    for benchmark in benchmarks:
+        if benchmark not in ["threads", "table-driven", "widths", "long-division"]:
+            sys.stderr.write("unknown benchmark: %s\n" % benchmark)
+            sys.exit(1)
+    data = os.urandom(options.size * 1024 * 1024)
+    if "threads" in benchmarks:
+        bench_threads(get_crc(options.model), data, [int(j) for j in options.jobs.split(",")], options.repeat)
+    if "table-driven" in benchmarks:
+        bench_table_driven(options.model, data, [int(w) for w in options.table_idx_width.split(",")], options.repeat)
+    if "widths" in benchmarks:
+        bench_widths(options.models.split(","), data, options.repeat)
+    if "long-division" in benchmarks:
+        bench_long_division(options.models.split(","), data, options.repeat)
+    return 0
+
+
+# program entry point
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,20 @@
 
 from optparse import OptionParser, Option, OptionValueError
 from copy import copy
-import os, sys, commands
+import os, sys
+import shutil
 import tempfile
+try:
+    from commands import getstatusoutput
+except ImportError:
+    from subprocess import getstatusoutput
 sys.path.append("..")
 from crc_models import CrcModels
-from crc_algorithms import Crc
+from crc_algorithms import Crc, CrcRolling
+import crc_algorithms
+import crc_numpy
+import crc_parallel
+import multiprocessing
 
 
 class Options(object):
@@ -18,7 +27,7 @@ class Options(object):
     """
 
     def __init__(self):
-        self.AllAlgorithms          = set(["bit-by-bit", "bbb", "bit-by-bit-fast", "bbf", "bitwise-expression", "bwe", "table-driven", "tbl"])
+        self.AllAlgorithms          = set(["bit-by-bit", "bbb", "bit-by-bit-fast", "bbf", "bitwise-expression", "bwe", "table-driven", "tbl", "slice-by-4", "sb4", "slice-by-8", "sb8", "slice-by-16", "sb16", "lane-parallel", "lanes", "long-division", "ld"])
         self.Compile                = False
         self.RandomParameters       = False
         self.CompileMixedArgs       = False
@@ -96,9 +105,14 @@ class CrcTests(object):
         self.use_algo_bit_by_bit_fast = True
         self.use_algo_table_driven = True
         self.use_algo_bitwise_expression = True
+        self.use_algo_slice_by = [4, 8, 16]
+        self.use_algo_lanes = True
+        self.use_algo_long_division = True
         self.verbose = False
         self.tmpdir = tempfile.mkdtemp(prefix="pycrc.")
         self.check_file = None
+        self.cache_dir = None
+        self.frozen_dir = None
         self.crc_bin_bbb_c89 = None
         self.crc_bin_bbb_c99 = None
         self.crc_bin_bbf_c89 = None
@@ -116,6 +130,10 @@ class CrcTests(object):
         """
         if self.check_file is not None:
             os.remove(self.check_file)
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir)
+        if self.frozen_dir is not None:
+            shutil.rmtree(self.frozen_dir)
         if self.crc_bin_bbb_c89 is not None:
             self.__del_files([self.crc_bin_bbb_c89, self.crc_bin_bbb_c89+".h", self.crc_bin_bbb_c89+".c"])
         if self.crc_bin_bbb_c99 is not None:
@@ -157,7 +175,7 @@ class CrcTests(object):
         cmd_str = self.pycrc_bin + " %s --std %s --generate h -o %s.h" % (args, cstd, gen_src)
         if self.verbose:
             print(cmd_str)
-        ret = commands.getstatusoutput(cmd_str)
+        ret = getstatusoutput(cmd_str)
         if ret[0] != 0:
             print("error: the following command returned error: %s" % cmd_str)
             print(ret[1])
@@ -167,7 +185,7 @@ class CrcTests(object):
         cmd_str = self.pycrc_bin + " %s --std %s --generate c-main -o %s.c" % (args, cstd, gen_src)
         if self.verbose:
             print(cmd_str)
-        ret = commands.getstatusoutput(cmd_str)
+        ret = getstatusoutput(cmd_str)
         if ret[0] != 0:
             print("error: the following command returned error: %s" % cmd_str)
             print(ret[1])
@@ -182,7 +200,7 @@ class CrcTests(object):
         cmd_str = "gcc -W -Wall -pedantic -Werror -std=%s -o %s %s.c" % (cstd, binfile, binfile)
         if self.verbose:
             print(cmd_str)
-        ret = commands.getstatusoutput(cmd_str)
+        ret = getstatusoutput(cmd_str)
         if len(ret) > 1 and len(ret[1]) > 0:
             print(ret[1])
         if ret[0] != 0:
@@ -210,7 +228,7 @@ class CrcTests(object):
             print("Setting up files...")
         self.check_file = "%s/check.txt" % self.tmpdir
         f = open(self.check_file, "wb")
-        f.write("123456789")
+        f.write(b"123456789")
         f.close()
 
         if opt.Compile:
@@ -266,7 +284,7 @@ class CrcTests(object):
         """
         if self.verbose:
             print(cmd_str)
-        ret = commands.getstatusoutput(cmd_str)
+        ret = getstatusoutput(cmd_str)
         if ret[0] != 0:
             print("error: the following command returned error: %s" % cmd_str)
             print(ret[1])
@@ -329,6 +347,34 @@ class CrcTests(object):
             if crc is None:
                 crc = tbl_crc
             error = error or tbl_crc != crc
+        sb_crc = {}
+        for slices in self.use_algo_slice_by:
+            sb_crc[slices] = alg.slice_by(check_str, slices)
+            if crc is None:
+                crc = sb_crc[slices]
+            error = error or sb_crc[slices] != crc
+        if self.use_algo_lanes:
+            lanes_crc = crc_numpy.lanes_crc(alg, check_str)
+            if crc is None:
+                crc = lanes_crc
+            error = error or lanes_crc != crc
+        if self.use_algo_long_division:
+            ld_crc = alg.long_division(check_str)
+            if crc is None:
+                crc = ld_crc
+            error = error or ld_crc != crc
+        native_crc = alg.native(check_str)
+        if crc is None:
+            crc = native_crc
+        error = error or native_crc != crc
+        range_crc = alg.slice_by(bytearray(b"--" + check_str.encode("latin-1") + b"-"), start = 2, end = -1)
+        if crc is None:
+            crc = range_crc
+        error = error or range_crc != crc
+        comb_crc = alg.combine(alg.bit_by_bit_fast(check_str[:4]), alg.bit_by_bit_fast(check_str[4:]), len(check_str) - 4)
+        if crc is None:
+            crc = comb_crc
+        error = error or comb_crc != crc
 
         if error:
             print("error: different checksums!")
@@ -340,12 +386,23 @@ class CrcTests(object):
                 print("       bit-by-bit-fast:   0x%x" % bbf_crc)
             if self.use_algo_table_driven:
                 print("       table_driven:      0x%x" % tbl_crc)
+            for slices in self.use_algo_slice_by:
+                print("       %-19s0x%x" % ("slice_by_%d:" % slices, sb_crc[slices]))
+            if self.use_algo_lanes:
+                print("       lane_parallel:     0x%x" % lanes_crc)
+            if self.use_algo_long_division:
+                print("       long_division:     0x%x" % ld_crc)
+            print("       native:            0x%x" % native_crc)
+            print("       slice_by range:    0x%x" % range_crc)
+            print("       combine:           0x%x" % comb_crc)
             return None
         return crc
 
-    def __compile_and_check_res(self, cmp_opt, run_opt, name, expected_crc):
+    def __compile_and_check_res(self, cmp_opt, run_opt, name, expected_crc, bit_checks = []):
         """
         Compile a model and run it.
+        bit_checks is a list of (bit_length, expected_crc) tuples, which are
+        checked with the --bit-length option of the binary.
         """
         filename = self.__make_bin(cmp_opt, name)
         if filename is None:
@@ -355,6 +412,8 @@ class CrcTests(object):
         else:
             cmd = filename + " " + run_opt
         ret = self.__check_command(cmd, expected_crc)
+        for (bit_length, bit_crc) in bit_checks:
+            ret = ret and self.__check_command("%s --bit-length %d" % (cmd, bit_length), bit_crc)
         self.__del_files([filename, filename+".h", filename+".c"])
         if not ret:
             return False
@@ -389,11 +448,37 @@ class CrcTests(object):
             if not self.__check_command(cmd_str, expected_crc):
                 return False
 
+            if self.use_algo_table_driven:
+                for idx_width in [1, 3, 12, 16]:
+                    cmd_str = self.pycrc_bin + " --model %s --algorithm table-driven --table-idx-width %d" % (m["name"], idx_width)
+                    if not self.__check_command(cmd_str, expected_crc):
+                        return False
+
             cmd_str = self.pycrc_bin + " --model %s --check-file %s" % (m["name"], self.check_file)
             if not self.__check_command(cmd_str, expected_crc):
                 return False
 
-            if not self.__check_bin(ext_args, expected_crc, m["width"] > 32):
+            cmd_str = self.pycrc_bin + " --model %s --jobs 2 --check-file %s" % (m["name"], self.check_file)
+            if not self.__check_command(cmd_str, expected_crc):
+                return False
+
+            for slices in self.use_algo_slice_by:
+                cmd_str = self.pycrc_bin + " --model %s --algorithm slice-by-%d --check-file %s" % (m["name"], slices, self.check_file)
+                if not self.__check_command(cmd_str, expected_crc):
+                    return False
+
+            if self.use_algo_lanes:
+                cmd_str = self.pycrc_bin + " --model %s --algorithm lane-parallel --check-file %s" % (m["name"], self.check_file)
+                if not self.__check_command(cmd_str, expected_crc):
+                    return False
+
+            if self.use_algo_long_division:
+                cmd_str = self.pycrc_bin + " --model %s --algorithm long-division --check-file %s" % (m["name"], self.check_file)
+                if not self.__check_command(cmd_str, expected_crc):
+                    return False
+
+            # The generated C code uses data types of at most 64 bits.
+            if m["width"] <= 64 and not self.__check_bin(ext_args, expected_crc, m["width"] > 32):
                 return False
 
         if self.verbose:
@@ -401,6 +486,83 @@ class CrcTests(object):
         return True
 
 
+    def __test_table_cache(self):
+        """
+        Test the on-disk table cache.
+        Prewarm the cache, damage one of the table files and check that all
+        models give the right results with the cached tables.
+        """
+        if self.verbose:
+            print("Running __test_table_cache()...")
+        self.cache_dir = "%s/cache" % self.tmpdir
+        cmd_str = self.pycrc_bin + " --cache-dir %s --prewarm-cache --verbose" % self.cache_dir
+        ret = self.__run_command(cmd_str)
+        if ret is None:
+            return False
+        files = ret.splitlines()[:-1]
+        if len(files) == 0:
+            print("error: no tables in the cache: %s" % cmd_str)
+            return False
+        f = open(files[0], "r+b")
+        f.seek(-1, os.SEEK_END)
+        value = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes(bytearray([ord(value) ^ 0x01])))
+        f.close()
+
+        models = CrcModels()
+        for m in models.models:
+            cmd_str = self.pycrc_bin + " --model %s --cache-dir %s --algorithm table-driven" % (m["name"], self.cache_dir)
+            if not self.__check_command(cmd_str, m["check"]):
+                return False
+            cmd_str = self.pycrc_bin + " --model %s --cache-dir %s --algorithm slice-by-16 --check-file %s" % (m["name"], self.cache_dir, self.check_file)
+            if not self.__check_command(cmd_str, m["check"]):
+                return False
+        return True
+
+
+    def __test_frozen_tables(self):
+        """
+        Test the frozen table module.
+        Generate the module and check all models with all algorithms.
+        """
+        if self.verbose:
+            print("Running __test_frozen_tables()...")
+        self.frozen_dir = "%s/frozen" % self.tmpdir
+        os.mkdir(self.frozen_dir)
+        cmd_str = "%s ../crc_freeze.py -o %s/crc_frozen.py --slices 4,8,16" % (self.pycrc_bin.split()[0], self.frozen_dir)
+        if self.__run_command(cmd_str) is None:
+            return False
+
+        models = CrcModels()
+        for m in models.models:
+            cmd_str = "PYTHONPATH=%s %s --model %s" % (self.frozen_dir, self.pycrc_bin, m["name"])
+            if not self.__check_command(cmd_str, m["check"]):
+                return False
+            cmd_str = "PYTHONPATH=%s %s --model %s --algorithm slice-by-16 --check-file %s" % (self.frozen_dir, self.pycrc_bin, m["name"], self.check_file)
+            if not self.__check_command(cmd_str, m["check"]):
+                return False
+
+        # the frozen tables are written to the on-disk cache as well
+        cmd_str = "PYTHONPATH=%s %s --cache-dir %s/cache --prewarm-cache --verbose" % (self.frozen_dir, self.pycrc_bin, self.frozen_dir)
+        ret = self.__run_command(cmd_str)
+        if ret is None:
+            return False
+        files = ret.splitlines()[:-1]
+        if len(files) == 0 or not all(os.path.exists(f) for f in files):
+            print("error: no tables in the cache: %s" % cmd_str)
+            return False
+
+        # the prewarm fails if no table can be written
+        cmd_str = self.pycrc_bin + " --cache-dir %s/cache --prewarm-cache" % self.check_file
+        if self.verbose:
+            print(cmd_str)
+        if getstatusoutput(cmd_str)[0] == 0:
+            print("error: the command did not fail: %s" % cmd_str)
+            return False
+        return True
+
+
     def __test_compiled_models(self):
         """
         Standard Tests.
@@ -411,6 +573,8 @@ class CrcTests(object):
         check_str = "123456789"
         models = CrcModels()
         for m in models.models:
+            if m["width"] > 64:
+                continue
             expected_crc = m["check"]
             cmp_opt = "--model %(name)s" % m
 
@@ -514,22 +678,613 @@ class CrcTests(object):
         return True
 
 
+    def __test_wide_width(self):
+        """
+        Test widths above 64 bits with the Python implementation.
+        """
+        if self.verbose:
+            print("Running __test_wide_width()...")
+        models = CrcModels()
+        m = models.getParams("crc-82-darc")
+
+        for width in [65, 72, 82, 96, 127, 128, 129]:
+            for reflect in [False, True]:
+                mask = (1 << width) - 1
+                mw = {
+                    'width':         width,
+                    'poly':          m['poly'] & mask,
+                    'reflect_in':    reflect,
+                    'xor_in':        mask,
+                    'reflect_out':   reflect,
+                    'xor_out':       mask & 0x5a5a5a5a5a5a5a5a5a5a5a5a5a5a5a5a5a,
+                }
+                args = "--width %(width)s --poly 0x%(poly)x --xor-in 0x%(xor_in)x --reflect-in %(reflect_in)s --xor-out 0x%(xor_out)x --reflect-out %(reflect_out)s" % mw
+
+                check = self.__get_crc(mw)
+                if check is None:
+                    return False
+
+                if not self.__check_command(self.pycrc_bin + " " + args, check):
+                    return False
+
+                cmd_str = self.pycrc_bin + " %s --algorithm table-driven --table-idx-width 16" % args
+                if not self.__check_command(cmd_str, check):
+                    return False
+
+                cmd_str = self.pycrc_bin + " %s --jobs 2 --check-file %s" % (args, self.check_file)
+                if not self.__check_command(cmd_str, check):
+                    return False
+        return True
+
+
+    def __get_crc_bits(self, alg, data, bit_length):
+        """
+        Bit-serial reference for message lengths which are not a multiple of 8 bits.
+        """
+        register = alg.XorIn
+        for i in range(bit_length):
+            octet = bytearray(data)[i // 8]
+            if alg.ReflectIn:
+                bit = (octet >> (i % 8)) & 0x01
+            else:
+                bit = (octet >> (7 - i % 8)) & 0x01
+            topbit = (register >> (alg.Width - 1)) & 0x01
+            register = (register << 1) & alg.Mask
+            if topbit != bit:
+                register ^= alg.Poly
+        if alg.ReflectOut:
+            register = alg.reflect(register, alg.Width)
+        return register ^ alg.XorOut
+
+
+    def __test_bit_lengths(self):
+        """
+        Test message lengths given in bits.
+        """
+        if self.verbose:
+            print("Running __test_bit_lengths()...")
+        data = b"123456789"
+        models = CrcModels()
+        for m in models.models:
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            if alg.bits(data, 8 * len(data)) != m["check"]:
+                print("error: different checksums!")
+                print("%s: expected 0x%x, got 0x%x" % (m["name"], m["check"], alg.bits(data, 8 * len(data))))
+                return False
+            for bit_length in [0, 1, 5, 7, 13, 29, 64, 67, 71]:
+                check = self.__get_crc_bits(alg, data, bit_length)
+                crc = alg.bits(data, bit_length)
+                if crc != check:
+                    print("error: different checksums!")
+                    print("%s, %d bits: expected 0x%x, got 0x%x" % (m["name"], bit_length, check, crc))
+                    return False
+
+                if m["width"] > 64:
+                    continue
+                args = "--width %(width)s --poly 0x%(poly)x --xor-in 0x%(xor_in)x --reflect-in %(reflect_in)s --xor-out 0x%(xor_out)x --reflect-out %(reflect_out)s" % m
+                if not self.__check_bin("%s --bit-length %d" % (args, bit_length), check, m["width"] > 32):
+                    return False
+        return True
+
+
+    def __test_repeated_data(self):
+        """
+        Test runs of zero octets and repeated patterns.
+        """
+        if self.verbose:
+            print("Running __test_repeated_data()...")
+        models = CrcModels()
+        for m in models.models:
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            register = alg.native_update(alg.init_register(), b"123456789")
+            for count in [0, 1, 2, 7, 255, 4096]:
+                check = alg.native_update(register, b"\x00" * count)
+                crc = alg.zeros_update(register, count)
+                if crc != check:
+                    print("error: different registers!")
+                    print("%s, %d zeros: expected 0x%x, got 0x%x" % (m["name"], count, check, crc))
+                    return False
+                for pattern in [b"\xff", b"\xde\xad\xbe\xef", b"12345"]:
+                    check = alg.native_update(register, pattern * count)
+                    crc = alg.repeat_update(register, pattern, count)
+                    if crc != check:
+                        print("error: different registers!")
+                        print("%s, %d x %r: expected 0x%x, got 0x%x" % (m["name"], count, pattern, check, crc))
+                        return False
+        return True
+
+
+    def __test_sparse_file(self):
+        """
+        Test the CRC of a sparse file, whose holes are not read.  Where the
+        file system reports holes, check that data_extents skips them.
+        """
+        if self.verbose:
+            print("Running __test_sparse_file()...")
+        sparse_file = "%s/sparse.bin" % self.tmpdir
+        f = open(sparse_file, "wb")
+        f.write(b"123456789")
+        f.seek(3 * 1024 * 1024)
+        f.write(b"\xde\xad\xbe\xef" * 4096)
+        f.seek(7 * 1024 * 1024 + 1)
+        f.write(b"123456789")
+        f.truncate(9 * 1024 * 1024)
+        f.close()
+        f = open(sparse_file, "rb")
+        data = f.read()
+        size = len(data)
+
+        # If the file system reports the holes, data_extents must return only
+        # the blocks around the data regions.
+        if hasattr(os, "SEEK_DATA") and os.lseek(f.fileno(), 0, os.SEEK_HOLE) < size:
+            extents = list(crc_parallel.data_extents(f, 0, size))
+            regions = [(0, 9), (3 * 1024 * 1024, 4 * 4096), (7 * 1024 * 1024 + 1, 9)]
+            if sum(length for (offset, length) in extents) > size // 4 or \
+                    not all(any(offset <= r_offset and r_offset + r_length <= offset + length for (offset, length) in extents) for (r_offset, r_length) in regions):
+                print("error: data_extents does not skip the holes: %s" % extents)
+                f.close()
+                os.remove(sparse_file)
+                return False
+        f.close()
+
+        models = CrcModels()
+        for model in ["crc-32", "crc-16", "crc-64-jones"]:
+            m = models.getParams(model)
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            check = alg.native(data)
+            for jobs in [1, 2]:
+                cmd_str = self.pycrc_bin + " --model %s --jobs %d --check-file %s" % (model, jobs, sparse_file)
+                if not self.__check_command(cmd_str, check):
+                    os.remove(sparse_file)
+                    return False
+        os.remove(sparse_file)
+        return True
+
+
+    def __test_rolling(self):
+        """
+        Test the rolling CRC and the scan for chunk boundaries.
+        """
+        if self.verbose:
+            print("Running __test_rolling()...")
+        data = b"".join([b"%d" % (i * i) for i in range(1000)])
+        mask = 0x1f
+        models = CrcModels()
+        for m in models.models:
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            for window in [1, 4, 48]:
+                rolling = CrcRolling(alg, window)
+                check_rolling = CrcRolling(alg, window)
+                boundaries = list(rolling.scan(data, mask))
+                check = []
+                for i in range(len(data)):
+                    check_rolling.update(data, i, i + 1)
+                    if check_rolling.Register & mask == mask:
+                        check.append(i + 1)
+                    if i % 97 == 0 or i == len(data) - 1:
+                        window_crc = alg.native(data[max(i + 1 - window, 0):i + 1].rjust(window, b"\x00"))
+                        if check_rolling.crcValue != window_crc:
+                            print("error: different checksums!")
+                            print("%s, window %d, offset %d: expected 0x%x, got 0x%x" % (m["name"], window, i + 1, window_crc, check_rolling.crcValue))
+                            return False
+                if boundaries != check or rolling.crcValue != check_rolling.crcValue:
+                    print("error: different boundaries!")
+                    print("%s, window %d: expected %r, got %r" % (m["name"], window, check, boundaries))
+                    return False
+        return True
+
+
+    def __test_multiple_models(self):
+        """
+        Test the checksums of several models calculated in a single pass.
+        """
+        if self.verbose:
+            print("Running __test_multiple_models()...")
+        models = CrcModels()
+        names = models.getList()
+        check = [models.getParams(name)["check"] for name in names]
+        for args in ["--check-string 123456789", "--check-hexstring 313233343536373839", "--check-file %s" % self.check_file, "--algorithm sb4"]:
+            cmd_str = self.pycrc_bin + " --model %s %s" % (",".join(names), args)
+            ret = self.__run_command(cmd_str)
+            if ret is None:
+                return False
+            crcs = [int(line, 16) for line in ret.split()]
+            if crcs != check:
+                print("error: different checksums!")
+                print("%s: expected %s, got %s" % (cmd_str, " ".join("0x%x" % crc for crc in check), " ".join("0x%x" % crc for crc in crcs)))
+                return False
+
+        data = b"".join([b"%d" % (i * i) for i in range(10000)])
+        h = crc_algorithms.new_multi(names)
+        h.update(data[:1000])
+        h.update(data[1000:])
+        check = [crc_algorithms.new(name, data).crcValue for name in names]
+        if h.crcValues != check:
+            print("error: different checksums!")
+            print("new_multi: expected %s, got %s" % (" ".join("0x%x" % crc for crc in check), " ".join("0x%x" % crc for crc in h.crcValues)))
+            return False
+        return True
+
+
+    def __test_long_division(self):
+        """
+        Test the long division algorithm with messages of several blocks,
+        and Crc.python_update with chunks of several sizes.
+        """
+        if not self.use_algo_long_division:
+            return True
+        if self.verbose:
+            print("Running __test_long_division()...")
+        data = b"".join([b"%d" % (i * i) for i in range(40000)])
+        models = CrcModels()
+        for m in models.models:
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            for size in [0, 1, 15, 1000, 65536, len(data)]:
+                check = alg.slice_by(data[:size])
+                crc = alg.long_division(data[:size])
+                if crc != check:
+                    print("error: different checksums!")
+                    print("%s, %d octets: expected 0x%x, got 0x%x" % (m["name"], size, check, crc))
+                    return False
+
+            # python_update switches between the long division and the
+            # table-driven algorithm depending on the size of each chunk.
+            h = crc_algorithms.CrcHash(alg)
+            position = 0
+            for size in [1, 255, 256, 3, 70000, 100]:
+                h.update(data[position:position + size])
+                position += size
+            check = alg.slice_by(data[:position])
+            if h.crcValue != check:
+                print("error: different checksums!")
+                print("%s, CrcHash, %d octets: expected 0x%x, got 0x%x" % (m["name"], position, check, h.crcValue))
+                return False
+
+        # messages of any length share one schedule in the table cache
+        for size in range(100):
+            alg.long_division(data[:size])
+        keys = [k for k in crc_algorithms.table_cache.memory() if k[:3] == (alg.Width, alg.Poly & alg.Mask, "long-division")]
+        if len(keys) != 1:
+            print("error: %d long division schedules in the table cache for %s" % (len(keys), m["name"]))
+            return False
+        return True
+
+
+    def __test_lanes(self):
+        """
+        Test the lane-parallel algorithm with messages of several sizes, and
+        check that the number of multiplication tables does not grow with
+        the number of sizes.
+        """
+        if not self.use_algo_lanes or crc_numpy.numpy is None:
+            return True
+        if self.verbose:
+            print("Running __test_lanes()...")
+        data = b"".join([b"%d" % (i * i) for i in range(100000)])
+        alg = Crc(width = 32, poly = 0x4c11db7, reflect_in = True, xor_in = 0xffffffff, reflect_out = True, xor_out = 0xffffffff)
+        for size in [0, 100, 8191, 8192, 65537, 100003, 262144, 300007, len(data)]:
+            check = alg.native(data[:size])
+            crc = crc_numpy.lanes_crc(alg, data[:size])
+            if crc != check:
+                print("error: different checksums!")
+                print("lane_parallel, %d octets: expected 0x%x, got 0x%x" % (size, check, crc))
+                return False
+        keys = [k for k in crc_algorithms.table_cache.memory() if k[:3] == (alg.Width, alg.Poly & alg.Mask, "mul-tables")]
+        if len(keys) > 12:
+            print("error: %d multiplication tables in the table cache" % len(keys))
+            return False
+        return True
+
+
+    def __test_batch_crc(self):
+        """
+        Test batch_crc against slice_by for each row, with and without NumPy.
+        Besides the known models, a non-reflected model of a Width below 8
+        bits (crc-6-cdma2000-a) is tested.
+        """
+        if self.verbose:
+            print("Running __test_batch_crc()...")
+        data = b"".join([b"%d" % (i * i) for i in range(1000)])
+        rows = [data[i * 37:(i + 1) * 37] for i in range(40)]
+        models = CrcModels()
+        params = models.models + [{
+            'name': 'crc-6-cdma2000-a', 'width': 6, 'poly': 0x27,
+            'reflect_in': False, 'xor_in': 0x3f, 'reflect_out': False, 'xor_out': 0x0,
+        }]
+        numpy = crc_numpy.numpy
+        try:
+            for np in set([numpy, None]):
+                crc_numpy.numpy = np
+                for m in params:
+                    alg = Crc(width = m["width"], poly = m["poly"],
+                        reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                        reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+                    if np is None:
+                        messages = rows
+                    else:
+                        messages = np.frombuffer(b"".join(rows), dtype = np.uint8).reshape(len(rows), -1)
+                    crcs = [int(crc) for crc in crc_numpy.batch_crc(alg, messages)]
+                    checks = [alg.slice_by(row) for row in rows]
+                    if crcs != checks:
+                        print("error: different checksums!")
+                        print("batch_crc, %s, %s: expected %s, got %s" % (m["name"], "numpy" if np else "no numpy", checks, crcs))
+                        return False
+        finally:
+            crc_numpy.numpy = numpy
+        return True
+
+
+    def __test_crc_buffer(self):
+        """
+        Test crc_parallel.crc_buffer with several threads on a buffer which
+        is split into several ranges.
+        """
+        if self.verbose:
+            print("Running __test_crc_buffer()...")
+        data = b"".join([b"%d" % (i * i) for i in range(120000)])
+        if len(data) < 2 * crc_parallel.MIN_THREAD_RANGE_SIZE:
+            print("error: the buffer is too short to be split")
+            return False
+        models = CrcModels()
+        for name in ["crc-32", "crc-16", "crc-64-xz"]:
+            m = models.getParams(name)
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            check = alg.native(data)
+            for (jobs, slices) in [(2, None), (3, None), (3, 8)]:
+                crc = crc_parallel.crc_buffer(alg, data, jobs, slices)
+                if crc != check:
+                    print("error: different checksums!")
+                    print("crc_buffer, %s, %d jobs: expected 0x%x, got 0x%x" % (name, jobs, check, crc))
+                    return False
+        return True
+
+
+    def __test_crc_hash(self):
+        """
+        Test CrcHash.copy, digest and hexdigest.  Two messages with a common
+        prefix are calculated by forking a CrcHash after the prefix; the
+        digests are checked for Widths which are not multiples of 8.
+        """
+        if self.verbose:
+            print("Running __test_crc_hash()...")
+        prefix = b"".join([b"%d" % (i * i) for i in range(300)])
+        models = CrcModels()
+        for name in ["crc-5", "crc-16", "crc-32", "crc-82-darc"]:
+            m = models.getParams(name)
+            alg = Crc(width = m["width"], poly = m["poly"],
+                reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+            h = crc_algorithms.CrcHash(alg, name)
+            h.update(prefix)
+            other = h.copy()
+            h.update(b"123456789")
+            other.update(b"987654321")
+            for (msg, hsh) in [(prefix + b"123456789", h), (prefix + b"987654321", other)]:
+                check = alg.slice_by(msg)
+                size = (m["width"] + 7) // 8
+                digest = hsh.digest()
+                if hsh.name != name or hsh.crcValue != check or len(digest) != size or \
+                        digest != bytes(bytearray((check >> (8 * (size - 1 - i))) & 0xff for i in range(size))) or \
+                        hsh.hexdigest() != "%0*x" % (2 * size, check):
+                    print("error: different checksums!")
+                    print("CrcHash, %s: expected 0x%x, got 0x%x, digest %r, hexdigest %s" % (name, check, hsh.crcValue, digest, hsh.hexdigest()))
+                    return False
+        return True
+
+
+    def __test_table_cache_lru(self):
+        """
+        Test the hit and miss counters and the eviction of CrcTableCache.
+        crc-32 and jam differ only in XorOut, so they share one table.
+        """
+        if self.verbose:
+            print("Running __test_table_cache_lru()...")
+        models = CrcModels()
+        table_cache = crc_algorithms.table_cache
+        crc_algorithms.table_cache = crc_algorithms.CrcTableCache()
+        try:
+            tables = []
+            for name in ["crc-32", "jam"]:
+                m = models.getParams(name)
+                alg = Crc(width = m["width"], poly = m["poly"],
+                    reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                    reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+                tables.append(alg.get_table())
+            cache = crc_algorithms.table_cache
+            if cache.Misses != 1 or cache.Hits != 1 or len(cache) != 1 or tables[0] is not tables[1]:
+                print("error: crc-32 and jam do not share a table: %d misses, %d hits, %d tables" % (cache.Misses, cache.Hits, len(cache)))
+                return False
+        finally:
+            crc_algorithms.table_cache = table_cache
+
+        cache = crc_algorithms.CrcTableCache(maxsize = 2)
+        generated = []
+        def gen(key):
+            generated.append(key)
+            return [len(generated)]
+        for key in ["a", "b", "a", "c", "a", "b"]:
+            cache.get((key, ), lambda: gen(key))
+        # "b" is the least recently used key when "c" is added, and "c"
+        # when "b" is added again.
+        if generated != ["a", "b", "c", "b"] or cache.Hits != 2 or cache.Misses != 4 or \
+                sorted(cache.memory()) != [("a", ), ("b", )]:
+            print("error: wrong eviction: generated %s, %d hits, %d misses, keys %s" % (generated, cache.Hits, cache.Misses, sorted(cache.memory())))
+            return False
+        return True
+
+
+    def __test_shared_tables(self):
+        """
+        Test that worker processes take the tables of SharedTables from
+        shared memory.  The model (crc-16-dnp) is not used elsewhere, so its
+        tables are not in the table cache of the parent process either.
+
+        With the slice-by-8 algorithm, the workers have no table cache miss.
+        With the default engine (see Crc.python_update), which crc_file uses
+        for models without a native routine, the table of the table-driven
+        algorithm is shared.  The long division schedule and the shift
+        operators it is built from are not stored as arrays, so each worker
+        generates them, once, for ranges of at least LONG_DIVISION_MIN_SIZE
+        octets.
+        """
+        if self.verbose:
+            print("Running __test_shared_tables()...")
+        alg = Crc(width = 16, poly = 0x3d65, reflect_in = True, xor_in = 0x0, reflect_out = True, xor_out = 0xffff)
+        slice_key = (alg.Width, alg.Poly, "slice-by", 8)
+        table_key = (alg.Width, alg.Poly, alg.ReflectIn, alg.TableIdxWidth)
+        generated = set([(alg.Width, alg.Poly, "long-division", crc_algorithms.SLICE_BLOCK_SIZE), (alg.Width, alg.Poly, "shift-operators")])
+        if any(key in crc_algorithms.table_cache.memory() for key in [slice_key, table_key] + list(generated)):
+            print("error: the tables of crc-16-dnp are already in the table cache")
+            return False
+        shared_file = "%s/shared.bin" % self.tmpdir
+        data = b"".join([b"%d" % (i * i) for i in range(20000)])
+        f = open(shared_file, "wb")
+        f.write(data)
+        f.close()
+        tests = [
+            (self.check_file, 9, 8, 0xea82, set()),
+            (self.check_file, 9, None, 0xea82, set()),
+            (shared_file, len(data), None, alg.bit_by_bit_fast(data), generated),
+            ]
+        try:
+            with crc_parallel.SharedTables() as tables:
+                tables.add(slice_key, tuple(alg.gen_slice_tables(8)))
+                tables.add(table_key, alg.gen_table())
+                for (filename, length, slices, check, keys) in tests:
+                    pool = multiprocessing.Pool(2, crc_parallel.attach_tables, (tables.spec(), ))
+                    try:
+                        results = pool.starmap(crc_file_range_misses, [(alg, filename, 0, length, slices)] * 2)
+                    finally:
+                        pool.close()
+                        pool.join()
+                    for (crc, misses, new_keys) in results:
+                        if crc != check or misses != len(keys) or new_keys != keys:
+                            print("error: shared tables, %d octets, slices %s: expected 0x%x and misses for %s, got 0x%x and %d misses for %s" %
+                                    (length, slices, check, sorted(keys), crc, misses, sorted(new_keys)))
+                            return False
+        finally:
+            os.remove(shared_file)
+        return True
+
+
+    def __test_unmasked_params(self):
+        """
+        Test models whose Poly, XorIn and XorOut have bits above Width, e.g.
+        the implicit top bit of the polynomial.  They must give the same
+        results as the canonical models, and must not corrupt the tables
+        which canonical models created later in the same process take from
+        the table cache.  Also check that combine rejects a negative length.
+        """
+        if self.verbose:
+            print("Running __test_unmasked_params()...")
+        data = b"".join([b"%d" % (i * i) for i in range(20000)])
+        models = CrcModels()
+        table_cache = crc_algorithms.table_cache
+        crc_algorithms.table_cache = crc_algorithms.CrcTableCache()
+        try:
+            for name in ["crc-5", "crc-16", "xmodem", "crc-32-mpeg", "crc-82-darc"]:
+                m = models.getParams(name)
+                top = 1 << m["width"]
+                unmasked = Crc(width = m["width"], poly = m["poly"] | top,
+                    reflect_in = m["reflect_in"], xor_in = m["xor_in"] | top,
+                    reflect_out = m["reflect_out"], xor_out = m["xor_out"] | top)
+                canonical = Crc(width = m["width"], poly = m["poly"],
+                    reflect_in = m["reflect_in"], xor_in = m["xor_in"],
+                    reflect_out = m["reflect_out"], xor_out = m["xor_out"])
+                check = canonical.bit_by_bit(data)
+                for alg in [unmasked, canonical]:
+                    results = [
+                        ("combine", alg.combine(alg.bit_by_bit(data[:1000]), alg.bit_by_bit(data[1000:]), len(data) - 1000)),
+                        ("native", alg.native(data)),
+                        ("bit_by_bit_fast", alg.bit_by_bit_fast(data)),
+                        ("table_driven", alg.table_driven(data)),
+                        ("slice_by", alg.slice_by(data)),
+                        ("long_division", alg.long_division(data)),
+                        ("crc_buffer", crc_parallel.crc_buffer(alg, data, 1)),
+                        ]
+                    for (algo, crc) in results:
+                        if crc != check:
+                            print("error: different checksums!")
+                            print("%s, %s, %s: expected 0x%x, got 0x%x" % (name, "unmasked" if alg is unmasked else "canonical", algo, check, crc))
+                            return False
+        finally:
+            crc_algorithms.table_cache = table_cache
+
+        # The results of the original implementation for the polynomial
+        # 0x18005 and for an XorIn of 0x1ffff.
+        for (poly, reflect_in, xor_in, check) in [(0x18005, False, 0x0, 0xfee8), (0x18005, True, 0x0, 0xbb3d), (0x8005, False, 0x1ffff, 0xaee7)]:
+            for idx_width in [4, 8]:
+                alg = Crc(width = 16, poly = poly, reflect_in = reflect_in, xor_in = xor_in,
+                    reflect_out = reflect_in, xor_out = 0x0, table_idx_width = idx_width)
+                crc = alg.table_driven(b"123456789")
+                if crc != check:
+                    print("error: different checksums!")
+                    print("poly 0x%x, xor_in 0x%x, table_driven, idx width %d: expected 0x%x, got 0x%x" % (poly, xor_in, idx_width, check, crc))
+                    return False
+
+        # combine rejects a negative length of the second message.
+        try:
+            canonical.combine(0, 0, -1)
+        except ValueError:
+            pass
+        else:
+            print("error: combine accepted a negative length")
+            return False
+        return True
+
+
     def __test_compiled_mixed_args(self):
         """
         Test compiled arguments.
         """
         if self.verbose:
             print("Running __test_compiled_mixed_args()...")
-        m =  {
-            'name':         'zmodem',
-            'width':         ["", "--width 16"],
-            'poly':          ["", "--poly 0x1021"],
-            'reflect_in':    ["", "--reflect-in False"],
-            'xor_in':        ["", "--xor-in 0x0"],
-            'reflect_out':   ["", "--reflect-out False"],
-            'xor_out':       ["", "--xor-out 0x0"],
-            'check':         0x31c3,
-        }
+        for m in [{
+                'name':         'zmodem',
+                'width':         ["", "--width 16"],
+                'poly':          ["", "--poly 0x1021"],
+                'reflect_in':    ["", "--reflect-in False"],
+                'xor_in':        ["", "--xor-in 0x0"],
+                'reflect_out':   ["", "--reflect-out False"],
+                'xor_out':       ["", "--xor-out 0x0"],
+                'check':         0x31c3,
+            }, {
+                'name':         'kermit',
+                'width':         ["", "--width 16"],
+                'poly':          ["", "--poly 0x1021"],
+                'reflect_in':    ["", "--reflect-in True"],
+                'xor_in':        ["", "--xor-in 0x0"],
+                'reflect_out':   ["", "--reflect-out True"],
+                'xor_out':       ["", "--xor-out 0x0"],
+                'check':         0x2189,
+            }]:
+            if not self.__test_compiled_mixed_args_model(m):
+                return False
+        return True
+
+
+    def __test_compiled_mixed_args_model(self, m):
+        """
+        Test compiled arguments of one model.
+        """
+        models = CrcModels()
+        params = models.getParams(m["name"])
+        alg = Crc(width = params["width"], poly = params["poly"],
+            reflect_in = params["reflect_in"], xor_in = params["xor_in"],
+            reflect_out = params["reflect_out"], xor_out = params["xor_out"])
+        bit_checks = [(bit_length, self.__get_crc_bits(alg, b"123456789", bit_length)) for bit_length in [13, 70]]
         cmp_args = {}
         run_args = {}
         for b_width in range(2):
@@ -555,15 +1310,15 @@ class CrcTests(object):
                                 run_opt = "%(width)s %(poly)s %(reflect_in)s %(xor_in)s %(reflect_out)s %(xor_out)s" %  run_args
 
                                 if self.use_algo_bit_by_bit:
-                                    if not self.__compile_and_check_res("--algorithm bit-by-bit" + " " + cmp_opt, run_opt, "crc_bbb_arg", m["check"]):
+                                    if not self.__compile_and_check_res("--algorithm bit-by-bit" + " " + cmp_opt, run_opt, "crc_bbb_arg", m["check"], bit_checks):
                                         return False
 
                                 if self.use_algo_bit_by_bit_fast:
-                                    if not self.__compile_and_check_res("--algorithm bit-by-bit-fast" + " " + cmp_opt, run_opt, "crc_bbf_arg", m["check"]):
+                                    if not self.__compile_and_check_res("--algorithm bit-by-bit-fast" + " " + cmp_opt, run_opt, "crc_bbf_arg", m["check"], bit_checks):
                                         return False
 
                                 if self.use_algo_table_driven:
-                                    if not self.__compile_and_check_res("--algorithm table-driven" + " " + cmp_opt, run_opt, "crc_tbl_arg", m["check"]):
+                                    if not self.__compile_and_check_res("--algorithm table-driven" + " " + cmp_opt, run_opt, "crc_tbl_arg", m["check"], bit_checks):
                                         return False
         return True
 
@@ -598,6 +1353,10 @@ class CrcTests(object):
         self.use_algo_bit_by_bit_fast = "bit-by-bit-fast" in opt.Algorithm or "bbf" in opt.Algorithm
         self.use_algo_bitwise_expression = "bitwise-expression" in opt.Algorithm or "bwe" in opt.Algorithm
         self.use_algo_table_driven = "table-driven" in opt.Algorithm or "tbl" in opt.Algorithm
+        self.use_algo_slice_by = [slices for slices in [4, 8, 16]
+                if "slice-by-%d" % slices in opt.Algorithm or "sb%d" % slices in opt.Algorithm]
+        self.use_algo_lanes = "lane-parallel" in opt.Algorithm or "lanes" in opt.Algorithm
+        self.use_algo_long_division = "long-division" in opt.Algorithm or "ld" in opt.Algorithm
         self.verbose = opt.Verbose
 
         if opt.Python3:
@@ -611,6 +1370,54 @@ class CrcTests(object):
         if not self.__test_models():
             return False
 
+        if not self.__test_table_cache():
+            return False
+
+        if not self.__test_frozen_tables():
+            return False
+
+        if not self.__test_wide_width():
+            return False
+
+        if not self.__test_bit_lengths():
+            return False
+
+        if not self.__test_repeated_data():
+            return False
+
+        if not self.__test_sparse_file():
+            return False
+
+        if not self.__test_rolling():
+            return False
+
+        if not self.__test_multiple_models():
+            return False
+
+        if not self.__test_long_division():
+            return False
+
+        if not self.__test_lanes():
+            return False
+
+        if not self.__test_batch_crc():
+            return False
+
+        if not self.__test_crc_buffer():
+            return False
+
+        if not self.__test_crc_hash():
+            return False
+
+        if not self.__test_table_cache_lru():
+            return False
+
+        if not self.__test_shared_tables():
+            return False
+
+        if not self.__test_unmasked_params():
+            return False
+
         if opt.Compile and not self.__test_compiled_models():
             return False
 
@@ -629,6 +1436,18 @@ class CrcTests(object):
         return True
 
 
+def crc_file_range_misses(crc, filename, offset, length, slices):
+    """
+    Return the CRC of a range of a file (see crc_parallel.crc_file_range), the
+    number of misses of the table cache of the worker process and the set of
+    the keys which have been added to the table cache.
+    """
+    misses = crc_algorithms.table_cache.Misses
+    keys = set(crc_algorithms.table_cache.memory())
+    crc = crc_parallel.crc_file_range(crc, filename, offset, length, slices)
+    return crc, crc_algorithms.table_cache.Misses - misses, set(crc_algorithms.table_cache.memory()) - keys
+
+
 def main():
     """
     Main function.